@@ -0,0 +1,134 @@
+'''
+	Measures how the generation of breadboards and microprocessors scales with the
+	number of pins. Every stage (writeMainSvg, writeSchematicSvg, writePcbSvg, icon,
+	createFzp, writeFzpz) is timed separately, together with its peak memory and the
+	size of the written file. The results are written as json, to compare releases.
+
+	call: python BenchmarkFritzingParts.py [-o results.json] [--boards 63 1000 ...] [--micros 17 100 ...] [--no-memory]
+'''
+
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+from fritzing.FritzingParts import FritzingPart, FritzingBreadBoard, FritzingMicroProcessor, MicroPin
+
+
+class StageTimer:
+	'''
+		Runs the stages of one part and collects their measurements
+	'''
+
+	def __init__(self, part, traceMemory):
+		self.m_part = part
+		self.m_traceMemory = traceMemory
+		self.m_stages = []
+
+
+	def run(self, name, postfix, func, *args):
+		'''
+			run func(*args) as the stage name, postfix denotes the written file
+		'''
+		if self.m_traceMemory:
+			tracemalloc.start()
+		start = time.perf_counter()
+		func(*args)
+		seconds = time.perf_counter() - start
+		stage = {'stage': name, 'seconds': round(seconds, 6)}
+		if self.m_traceMemory:
+			stage['peakBytes'] = tracemalloc.get_traced_memory()[1]
+			tracemalloc.stop()
+		fullName = self.m_part.getFullPathFor(postfix)
+		stage['outputBytes'] = os.path.getsize(fullName) if os.path.exists(fullName) else None
+		self.m_stages.append(stage)
+
+
+	def getResult(self, kind, size, numPins):
+		return {
+			'kind': kind,
+			'size': size,
+			'pins': numPins,
+			'totalSeconds': round(sum(stage['seconds'] for stage in self.m_stages), 6),
+			'stages': self.m_stages
+		}
+
+
+def benchmarkBreadBoard(numPins, outFolder, traceMemory):
+	pinDist = 0.1
+	left = pinDist
+	board = FritzingBreadBoard('in', outFolder, 'Board' + str(numPins), (numPins + 3) * pinDist, 27 * pinDist, numPins, pinDist)
+	y = pinDist
+	y = board.add2OuterRows('ZY', left, y)
+	y = board.addInnerRows('JIHGF', left, y, True, True)
+	y = board.add2OuterRows('XW', left, y)
+	y = board.addInnerRows('EDCBA', left, y, True, True)
+	board.add2OuterRows('VU', left, y)
+	board.m_busGroups = [['A', 'B', 'C', 'D', 'E'], ['F', 'G', 'H', 'I', 'J']]
+	numSockets = sum(1 for _ in board.iterAllPins())
+
+	timer = StageTimer(board, traceMemory)
+	timer.run('writeMainSvg', 'Main.svg', board.writeMainSvg)
+	timer.run('icon', 'Icon.svg', board.createIconSvg, '--' + str(numPins) + '--')
+	timer.run('createFzp', '.fzp', board.createFzp, 'BenchModuleID', '0.12.34', {'title': 'bench'}, ['bench'], [['family', 'bench']])
+	timer.run('writeFzpz', '.fzpz', board.writeFzpz)
+	return timer.getResult('breadboard', numPins, numSockets)
+
+
+def benchmarkMicroProcessor(numPins, outFolder, traceMemory):
+	pinDist = 2.54
+	width = (numPins + 3) * pinDist
+	height = 18
+	miPro = FritzingMicroProcessor('mm', outFolder, 'Micro' + str(numPins), width, height, pinDist)
+	upperPins = [MicroPin('U' + str(ii), 'l' + str(ii + 1)) for ii in range(numPins)]
+	lowerPins = [MicroPin('L' + str(ii), 'r' + str(ii + 1)) for ii in range(numPins)]
+	upperPins[-1] = MicroPin('GND-2', 'oL0')
+	miPro.addPinRow('upper', pinDist * 1.5, pinDist * 0.5, pinDist, 0, upperPins)
+	miPro.addPinRow('lower', pinDist * 1.5, pinDist * 6.5, pinDist, 0, lowerPins)
+
+	timer = StageTimer(miPro, traceMemory)
+	timer.run('writeMainSvg', 'Main.svg', miPro.writeMainSvg)
+	timer.run('writeSchematicSvg', 'Schematic.svg', miPro.writeSchematicSvg, 8, numPins + 2, 3)
+	timer.run('writePcbSvg', 'Pcb.svg', miPro.writePcbSvg)
+	miPro.createIconRootNode()
+	timer.run('icon', 'Icon.svg', miPro.writeOutIconFile)
+	timer.run('createFzp', '.fzp', miPro.createFzp, 'BenchModuleID', '0.12.34', {'title': 'bench'}, ['bench'], [['family', 'bench']])
+	timer.run('writeFzpz', '.fzpz', miPro.writeFzpz)
+	return timer.getResult('microprocessor', numPins, 2 * numPins)
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='scaling benchmark of fritzing part generation')
+	parser.add_argument('-o', '--out', default=None, help='json result file (default: stdout)')
+	parser.add_argument('--boards', type=int, nargs='*', default=[63, 250, 1000, 4000, 10000], help='breadboard pins per line')
+	parser.add_argument('--micros', type=int, nargs='*', default=[17, 64, 256, 512], help='microprocessor pins per row')
+	parser.add_argument('--no-memory', dest='memory', action='store_false', help='do not trace peak memory (faster, more exact timings)')
+	args = parser.parse_args()
+
+	results = []
+	with tempfile.TemporaryDirectory() as outFolder:
+		for numPins in args.boards:
+			results.append(benchmarkBreadBoard(numPins, outFolder, args.memory))
+			print('breadboard ' + str(numPins) + ': ' + str(results[-1]['totalSeconds']) + ' s', file=sys.stderr)
+		for numPins in args.micros:
+			results.append(benchmarkMicroProcessor(numPins, outFolder, args.memory))
+			print('microprocessor ' + str(numPins) + ': ' + str(results[-1]['totalSeconds']) + ' s', file=sys.stderr)
+
+	report = {
+		'python': platform.python_version(),
+		'platform': platform.platform(),
+		'library': FritzingPart.getLibraryFingerprint(),
+		'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+		'tracedMemory': args.memory,
+		'results': results
+	}
+	if args.out:
+		with open(args.out, 'w', encoding='utf-8') as outFile:
+			json.dump(report, outFile, indent='\t')
+	else:
+		json.dump(report, sys.stdout, indent='\t')
+		print()
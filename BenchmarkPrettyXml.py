@@ -0,0 +1,71 @@
+'''
+	Compares the former xml output (ElementTree.tostring -> minidom -> toprettyxml)
+	with the single pass PrettyXmlWriter of fritzing.FritzingParts on a large
+	breadboard. Both outputs must be byte identical.
+
+	call: python BenchmarkPrettyXml.py [numPins]
+'''
+
+
+import io
+import sys
+import time
+import tempfile
+import tracemalloc
+import xml.etree.ElementTree as ET
+from xml.dom import minidom
+from fritzing.FritzingParts import FritzingBreadBoard, PrettyXmlWriter
+
+
+def minidomBytes(root):
+	'''
+		the way writePrettyXml worked before
+	'''
+	rough_string = ET.tostring(root, 'utf-8')
+	reparsed = minidom.parseString(rough_string)
+	return reparsed.toprettyxml(indent="	", newl='\n', encoding='utf-8')
+
+
+def writerBytes(root):
+	buffer = io.BytesIO()
+	stream = io.TextIOWrapper(buffer, encoding='utf-8', newline='')
+	PrettyXmlWriter(stream).writeDocument(root)
+	stream.flush()
+	return buffer.getvalue()
+
+
+def measure(func, root):
+	'''
+		return (result, seconds, peak memory in bytes)
+	'''
+	tracemalloc.start()
+	start = time.perf_counter()
+	result = func(root)
+	seconds = time.perf_counter() - start
+	_, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	return result, seconds, peak
+
+
+numPins = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+pinDist = 0.1
+left = pinDist
+
+with tempfile.TemporaryDirectory() as outFolder:
+	board = FritzingBreadBoard('in', outFolder, 'Bench', (numPins + 3) * pinDist, 27 * pinDist, numPins, pinDist)
+	y = pinDist
+	y = board.add2OuterRows('ZY', left, y)
+	y = board.addInnerRows('JIHGF', left, y, True, True)
+	y = board.add2OuterRows('XW', left, y)
+	y = board.addInnerRows('EDCBA', left, y, True, True)
+	board.add2OuterRows('VU', left, y)
+	board.writeMainSvg()
+	root = board.m_svgRoot
+
+	old, oldSeconds, oldPeak = measure(minidomBytes, root)
+	new, newSeconds, newPeak = measure(writerBytes, root)
+
+print('pins per line: ' + str(numPins) + ', Main.svg bytes: ' + str(len(new)))
+print('minidom:         ' + format(oldSeconds, '.3f') + ' s, peak ' + str(oldPeak // 1024) + ' KiB')
+print('PrettyXmlWriter: ' + format(newSeconds, '.3f') + ' s, peak ' + str(newPeak // 1024) + ' KiB')
+print('speedup: ' + format(oldSeconds / newSeconds, '.1f') + 'x, identical: ' + str(old == new))
@@ -0,0 +1,50 @@
+'''
+	Creates all variants of part families (a base spec and a grid of parameters, see fritzing.FritzingFamily).
+	The variants of a family share their common geometry and xml, so a family of many variants
+	is built much faster than the same parts from single spec files.
+
+	call: python CreatePartFamilies.py [-o outFolder] [-i] [-c profile] [-r] [-w] family ...
+	e.g.: python CreatePartFamilies.py families/BroadBreadBoards.json
+
+	-i, -c, -r and -w as for CreatePartsFromSpecs.py.
+	Prints one line per variant and ends with exit code 1 if any variant failed.
+'''
+
+
+import os
+import sys
+import argparse
+from fritzing.FritzingFamily import PartFamily
+
+
+def report(result):
+	if result['ok']:
+		state = '' if result['changed'] else ', unchanged'
+		print('ok     ' + str(result['part']) + ' (' + str(result['seconds']) + ' s' + state + ')')
+	else:
+		print('FAILED ' + str(result['part'] or result['spec']) + ': ' + result['error'])
+
+
+if __name__ == '__main__':
+	ownFolder = os.path.dirname(os.path.abspath(__file__))
+	parser = argparse.ArgumentParser(description='create the variants of fritzing part families')
+	parser.add_argument('families', nargs='+', help='family files (json or toml)')
+	parser.add_argument('-o', '--out', default=ownFolder + '/generated', help='output folder (default: generated)')
+	parser.add_argument('-i', '--incremental', action='store_true', help='only generate files with changed inputs')
+	parser.add_argument('-c', '--compression', default='default', choices=['stored', 'fast', 'default', 'max'], help='compression of the fzpz files')
+	parser.add_argument('-r', '--reproducible', action='store_true', help='fixed timestamps and permissions in the fzpz files')
+	parser.add_argument('-w', '--write-behind', action='store_true', help='write the files on a background thread')
+	args = parser.parse_args()
+
+	results = []
+	for path in args.families:
+		try:
+			family = PartFamily.load(path)
+		except Exception as exc:
+			print('FAILED ' + path + ': ' + str(exc))
+			results.append({'ok': False})
+			continue
+		results += family.build(args.out, report, args.incremental, [args.compression, args.reproducible], args.write_behind)
+	failed = [result for result in results if not result['ok']]
+	print(str(len(results) - len(failed)) + ' parts created, ' + str(len(failed)) + ' failed')
+	sys.exit(1 if failed else 0)
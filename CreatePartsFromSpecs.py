@@ -0,0 +1,49 @@
+'''
+	Creates fritzing parts from declarative spec files (json or toml, see fritzing.FritzingSpecs)
+	in parallel, one part per process of a process pool.
+
+	call: python CreatePartsFromSpecs.py [-o outFolder] [-j numProcesses] [-i] [-c profile] [-r] [-w] [--report | --profile] spec-or-folder ...
+	e.g.: python CreatePartsFromSpecs.py specs
+
+	With -i only the files whose inputs changed since the last run are generated again.
+	-c selects the compression of the fzpz files (stored, fast, default, max),
+	-r makes them reproducible (byte identical for identical parts).
+	-w writes the files on a background thread while the part is rendered (e.g. for network volumes).
+	--report writes <name>.report.json with time, memory, elements and bytes per stage,
+	--profile additionally dumps a cProfile file per stage, all next to the part files.
+	Prints one line per part and ends with exit code 1 if any part failed.
+'''
+
+
+import os
+import sys
+import argparse
+from fritzing.FritzingSpecs import generateParts
+
+
+def report(result):
+	if result['ok']:
+		state = '' if result['changed'] else ', unchanged'
+		print('ok     ' + str(result['part']) + ' (' + str(result['seconds']) + ' s' + state + ')')
+	else:
+		print('FAILED ' + result['spec'] + ': ' + result['error'])
+
+
+if __name__ == '__main__':
+	ownFolder = os.path.dirname(os.path.abspath(__file__))
+	parser = argparse.ArgumentParser(description='create fritzing parts from spec files')
+	parser.add_argument('specs', nargs='+', help='spec files or folders containing spec files')
+	parser.add_argument('-o', '--out', default=ownFolder + '/generated', help='output folder (default: generated)')
+	parser.add_argument('-j', '--jobs', type=int, default=None, help='number of processes (default: all cores)')
+	parser.add_argument('-i', '--incremental', action='store_true', help='only generate files with changed inputs')
+	parser.add_argument('-c', '--compression', default='default', choices=['stored', 'fast', 'default', 'max'], help='compression of the fzpz files')
+	parser.add_argument('-r', '--reproducible', action='store_true', help='fixed timestamps and permissions in the fzpz files')
+	parser.add_argument('-w', '--write-behind', action='store_true', help='write the files on a background thread')
+	parser.add_argument('--report', dest='instrument', action='store_const', const='report', help='write a json report per part')
+	parser.add_argument('--profile', dest='instrument', action='store_const', const='profile', help='like --report, plus cProfile dumps per stage')
+	args = parser.parse_args()
+
+	results = generateParts(args.specs, args.out, args.jobs, report, args.incremental, [args.compression, args.reproducible], args.instrument, args.write_behind)
+	failed = [result for result in results if not result['ok']]
+	print(str(len(results) - len(failed)) + ' parts created, ' + str(len(failed)) + ' failed')
+	sys.exit(1 if failed else 0)
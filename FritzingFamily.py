@@ -0,0 +1,140 @@
+'''
+	Part families: one base spec (see fritzing.FritzingSpecs) built for all combinations of a grid of
+	parameters, e.g. a breadboard in several widths, pitches and units. The variants are built one
+	after the other in one process and share what they have in common (see FritzingParts.SharedCache):
+	the location lists, the socket, connector and bus elements and their written text. The socket
+	paths (UnitContext) and the font metrics (FontMetrics) are cached per process anyway.
+
+	A family file (json or toml, see families/BroadBreadBoards.json) looks like:
+		base:			a spec, or the path of a spec file (relative to the family file)
+		sweep:			{key: [value, ...], ...} of top level spec keys, each combination is one variant
+		common:			{key: value, ...} top level spec keys set in all variants (optional)
+		fileNameRoot:	format of the variant names, e.g. "BreadBoard{numPins}_{unit}" (optional,
+						default: the base name followed by the values). iconText may use the same fields
+	The moduleId of each variant is <fileNameRoot>ModuleID.
+	In breadboard families numPins, pinDist and unit keep the look of the base board: the lengths
+	not swept themselves are converted to the unit and scaled by the pitch, the width follows numPins
+'''
+
+
+import os
+import re
+import copy
+import time
+import traceback
+from itertools import product
+from fritzing.FritzingParts import SharedCache
+from fritzing.FritzingSpecs import PartSpec
+
+
+class PartFamily:
+	'''
+		A base spec and the parameter grid of its variants
+	'''
+	s_breadBoardLengths = ['left', 'top', 'height']		# scaled with the pitch
+
+	def __init__(self, base, sweep, nameFormat=None, sourceName='<family>', common=None):
+		self.m_base = dict(base, **(common or {}))
+		self.m_sweep = sweep
+		self.m_nameFormat = nameFormat
+		self.m_sourceName = sourceName
+
+
+	@classmethod
+	def load(cls, path):
+		'''
+			read a family from a .json or .toml file
+		'''
+		data = PartSpec.load(path).m_data
+		base = data.get('base')
+		if isinstance(base, str):
+			base = PartSpec.load(os.path.join(os.path.dirname(path), base)).m_data
+		if not isinstance(base, dict) or not isinstance(data.get('sweep'), dict):
+			raise Exception(path + ': a family needs a base spec and a sweep')
+		return cls(base, data['sweep'], data.get('fileNameRoot'), path, data.get('common'))
+
+
+	def getParameters(self):
+		'''
+			return the parameters of all variants: one dict key => value per combination
+		'''
+		keys = list(self.m_sweep.keys())
+		return [dict(zip(keys, values)) for values in product(*(self.m_sweep[key] for key in keys))]
+
+
+	def getVariantName(self, params):
+		baseName = self.m_base.get('fileNameRoot', 'Part')
+		if self.m_nameFormat is not None:
+			return self.m_nameFormat.format(fileNameRoot=baseName, **params)
+		parts = [baseName]
+		for key, value in params.items():
+			# lists (e.g. colors) are named by their position in the sweep
+			text = str(value) if isinstance(value, (str, int, float)) else key + str(self.m_sweep[key].index(value))
+			parts.append(re.sub(r'[^\w.-]', '', text))
+		return '_'.join(parts)
+
+
+	def createVariantSpec(self, params):
+		'''
+			return the PartSpec of the variant with the given parameters
+		'''
+		data = copy.deepcopy(self.m_base)
+		data.update(copy.deepcopy(params))
+		name = self.getVariantName(params)
+		data['fileNameRoot'] = name
+		if isinstance(data.get('iconText'), str):
+			data['iconText'] = data['iconText'].format(fileNameRoot=name, **params)
+		if isinstance(data.get('fzp'), dict):
+			data['fzp']['moduleId'] = name + 'ModuleID'
+		if data.get('type') == 'breadboard':
+			self.deriveBreadBoard(data, params)
+		return PartSpec(data, self.m_sourceName + ': ' + name)
+
+
+	def deriveBreadBoard(self, data, params):
+		'''
+			the lengths of a breadboard variant, which are not swept themselves
+		'''
+		base = PartSpec(self.m_base, self.m_sourceName)
+		baseUnit, unit = base.need('unit'), data['unit']
+		unitScale = 1.0
+		if baseUnit != unit:
+			unitScale = 25.4 if unit == 'mm' else 1 / 25.4
+		basePinDist = base.need('pinDist')
+		pinDist = params.get('pinDist', basePinDist * unitScale)
+		scale = pinDist / basePinDist
+		for key in self.s_breadBoardLengths:
+			if key not in params:
+				data[key] = round(base.need(key) * scale, 6)
+		if 'width' not in params:
+			margin = base.need('width') - (base.need('numPins') + 1) * basePinDist
+			data['width'] = round(margin * scale + (data['numPins'] + 1) * pinDist, 6)
+		data['pinDist'] = round(pinDist, 6)
+
+
+	def build(self, outRoot, reportFunc=None, incremental=False, zipOptions=None, writeBehind=False):
+		'''
+			Build all variants into outRoot/<variant name>, sharing one SharedCache.
+			incremental, zipOptions, writeBehind: see PartSpec.build().
+			reportFunc(result) is called for each finished variant.
+			Return the list of result dicts (as fritzing.FritzingSpecs.buildSpecFile()) in the order of the grid
+		'''
+		cache = SharedCache()
+		results = []
+		for params in self.getParameters():
+			start = time.perf_counter()
+			result = {'spec': self.m_sourceName, 'part': None, 'ok': False, 'error': None, 'changed': None}
+			try:
+				spec = self.createVariantSpec(params)
+				result['part'] = spec.getFileNameRoot()
+				part = spec.build(outRoot, incremental=incremental, zipOptions=zipOptions, writeBehind=writeBehind, sharedCache=cache)
+				result['changed'] = part.m_outputsChanged
+				result['ok'] = True
+			except Exception as exc:
+				result['error'] = str(exc) or type(exc).__name__
+				result['traceback'] = traceback.format_exc()
+			result['seconds'] = round(time.perf_counter() - start, 3)
+			if reportFunc is not None:
+				reportFunc(result)
+			results.append(result)
+		return results
@@ -0,0 +1,595 @@
+'''
+	Reads fzpz files written by FritzingPart.writeFzpz() (and similar parts) back into the models
+	of fritzing.FritzingParts, e.g. to generate legacy parts again with the current writers.
+	All xml is read streaming with iterparse, so big svg files are never held as a whole.
+
+	importer = FzpzImporter('ArduinoMicro_00.fzpz')
+	spec = importer.getSpec()					# the part as declarative spec (see fritzing.FritzingSpecs)
+	part = importer.createPart(outRoot)			# FritzingMicroProcessor or FritzingBreadBoard, nothing written yet
+	PartSpec(spec).build(outRoot)				# or all files generated again
+
+	Recovered are the pins with positions, schematic sides and pin types, the rows of breadboards,
+	buses, texts and rects of the breadboard view, icon texts, meta, tags and properties
+'''
+
+
+import os
+import re
+import json
+import time
+import traceback
+import xml.etree.ElementTree as ET
+from zipfile import ZipFile
+from concurrent.futures import ProcessPoolExecutor
+from fritzing.FritzingSpecs import PartSpec
+from fritzing.FritzingParts import SvgCompactor
+
+
+def localName(tag):
+	'''
+		the tag without its namespace ({http://www.w3.org/2000/svg}circle => circle)
+	'''
+	return tag.rsplit('}', 1)[-1]
+
+
+def parseNumber(text):
+	'''
+		'24' => 24, '24.0' => 24.0, so a regenerated file shows the same numbers
+	'''
+	text = text.strip()
+	if re.fullmatch(r'-?\d+', text):
+		return int(text)
+	return float(text)
+
+
+def parseLength(text):
+	'''
+		'48mm' => ['mm', 48], '2.7in' => ['in', 2.7]
+	'''
+	match = re.fullmatch(r'\s*(-?[\d.]+)\s*(mm|in)\s*', text or '')
+	if match is None:
+		raise Exception('unsupported svg length (mm or in needed): ' + str(text))
+	return [match.group(2), parseNumber(match.group(1))]
+
+
+def iterXml(stream):
+	'''
+		Parse streaming and yield (event, element, path) for the start and end of every element,
+		path being the list of the enclosing (open) elements. Finished elements are dropped
+		after their end event, so only the open elements are held in memory
+	'''
+	path = []
+	for event, elem in ET.iterparse(stream, events=('start', 'end')):
+		if event == 'start':
+			yield event, elem, path
+			path.append(elem)
+		else:
+			path.pop()
+			yield event, elem, path
+			if path:
+				del path[-1][:]		# all children of the parent are done
+			else:
+				elem.clear()
+
+
+def readFzp(stream):
+	'''
+		Read a fzp file into a dict with
+			moduleId, fritzingVersion
+			meta:		list of [key, text]
+			tags:		list of texts
+			properties:	list of [name, text]
+			views:		view tag (e.g. breadboardView) => [image, list of layer ids]
+			connectors:	list of {id, name, type, views: view tag => list of [layer, svgId, terminalId]}
+			buses:		list of [id, list of connector ids]
+	'''
+	fzp = {'moduleId': None, 'fritzingVersion': None, 'meta': [], 'tags': [], 'properties': [],
+		'views': dict(), 'connectors': [], 'buses': []}
+	structure = ['tags', 'properties', 'views', 'connectors', 'buses']
+	for event, elem, path in iterXml(stream):
+		tag = localName(elem.tag)
+		parentTag = localName(path[-1].tag) if path else None
+		if event == 'start':
+			if not path:
+				fzp['moduleId'] = elem.get('moduleId')
+				fzp['fritzingVersion'] = elem.get('fritzingVersion')
+			elif tag == 'connector' and parentTag == 'connectors':
+				fzp['connectors'].append({'id': elem.get('id'), 'name': elem.get('name'), 'type': elem.get('type'), 'views': dict()})
+			elif tag == 'bus' and parentTag == 'buses':
+				fzp['buses'].append([elem.get('id'), []])
+			elif tag == 'layers' and len(path) == 3 and localName(path[1].tag) == 'views':
+				fzp['views'][parentTag] = [elem.get('image'), []]
+			continue
+
+		text = (elem.text or '').strip()
+		if len(path) == 1 and tag not in structure:
+			fzp['meta'].append([tag, text])
+		elif tag == 'tag' and parentTag == 'tags':
+			fzp['tags'].append(text)
+		elif tag == 'property' and parentTag == 'properties':
+			fzp['properties'].append([elem.get('name'), text])
+		elif tag == 'layer' and parentTag == 'layers' and len(path) == 4:
+			fzp['views'][localName(path[-2].tag)][1].append(elem.get('layerId'))
+		elif tag == 'p' and len(path) >= 3 and localName(path[-3].tag) == 'connector':
+			connViews = fzp['connectors'][-1]['views']
+			connViews.setdefault(parentTag, []).append([elem.get('layer'), elem.get('svgId'), elem.get('terminalId')])
+		elif tag == 'nodeMember' and parentTag == 'bus':
+			fzp['buses'][-1][1].append(elem.get('connectorId'))
+	return fzp
+
+
+def readSvgRoot(elem):
+	'''
+		return [unit, width, height] of the svg root node
+	'''
+	unit, width = parseLength(elem.get('width'))
+	heightUnit, height = parseLength(elem.get('height'))
+	if heightUnit != unit:
+		raise Exception('svg width and height use different units')
+	return [unit, width, height]
+
+
+def findSvgMember(names, image):
+	'''
+		return the member name of the svg file of a view image (e.g. breadboard/XMain.svg)
+		among the member names of a fzpz file, or None
+	'''
+	wanted = 'svg.' + image.replace('/', '.')
+	if wanted in names:
+		return wanted
+	baseName = image.split('/')[-1]
+	for name in names:
+		if name.endswith(baseName):
+			return name
+	return None
+
+
+def isClose(value1, value2, tolerance=0.0015):
+	'''
+		compare coordinates, that were rounded to 3 digits when written
+	'''
+	return abs(value1 - value2) < tolerance
+
+
+########################################################################
+########################################################################
+
+
+class FzpzImporter:
+	'''
+		Reads one fzpz file into a spec (see fritzing.FritzingSpecs) and a part model
+	'''
+	s_microRadiusFactor = 0.15		# pin radius / pin distance, see FritzingMicroProcessor.__init__()
+
+	def __init__(self, path):
+		self.m_path = path
+		self.m_spec = None
+
+
+	def getSpec(self):
+		'''
+			return the spec of the part (read once)
+		'''
+		if self.m_spec is None:
+			with ZipFile(self.m_path) as zipFile:
+				self.m_spec = self.readSpec(zipFile)
+		return self.m_spec
+
+
+	def createPart(self, outRoot=None):
+		'''
+			return the FritzingMicroProcessor or FritzingBreadBoard with all pins, rows, buses
+			and texts of the fzpz file, nothing written yet
+		'''
+		return PartSpec(self.getSpec(), self.m_path).createPart(outRoot)
+
+
+	def findMember(self, zipFile, image):
+		'''
+			return the member name of the svg file of a view image (e.g. breadboard/XMain.svg)
+		'''
+		ret = findSvgMember(zipFile.namelist(), image)
+		if ret is None:
+			raise Exception(self.m_path + ': missing svg file ' + image)
+		return ret
+
+
+	def readSpec(self, zipFile):
+		fzpNames = [name for name in zipFile.namelist() if name.endswith('.fzp')]
+		if len(fzpNames) != 1:
+			raise Exception(self.m_path + ': one fzp file expected, found ' + str(len(fzpNames)))
+		with zipFile.open(fzpNames[0]) as stream:
+			fzp = readFzp(stream)
+		fileNameRoot = fzpNames[0][:-len('.fzp')]
+		if fileNameRoot.startswith('part.'):
+			fileNameRoot = fileNameRoot[len('part.'):]
+
+		views = fzp['views']
+		for viewTag in ['iconView', 'breadboardView', 'schematicView']:
+			if viewTag not in views:
+				raise Exception(self.m_path + ': missing view ' + viewTag)
+		spec = {'fileNameRoot': fileNameRoot}
+		if views['schematicView'][0] == views['breadboardView'][0]:
+			spec['type'] = 'breadboard'
+			self.readBreadBoard(zipFile, fzp, spec)
+		else:
+			spec['type'] = 'microprocessor'
+			self.readMicroProcessor(zipFile, fzp, spec)
+		spec['fzp'] = {
+			'moduleId': fzp['moduleId'],
+			'fritzingVersion': fzp['fritzingVersion'],
+			'meta': dict(fzp['meta']),
+			'tags': fzp['tags'],
+			'properties': fzp['properties']
+		}
+		return spec
+
+
+	def readSvg(self, zipFile, image, handleElement):
+		'''
+			stream the svg file of image, calling handleElement(tag, element, groupIds) at the end of
+			every element (groupIds: ids of the enclosing elements). Attributes the element inherits
+			from its groups (compact svg files, see SvgCompactor) are set on it first.
+			Return [unit, width, height]
+		'''
+		size = None
+		with zipFile.open(self.findMember(zipFile, image)) as stream:
+			for event, elem, path in iterXml(stream):
+				if event == 'start':
+					if not path:
+						size = readSvgRoot(elem)
+					continue
+				if path:
+					for key in SvgCompactor.s_inheritedAttributes:
+						if key not in elem.attrib:
+							value = next((parent.get(key) for parent in reversed(path) if key in parent.attrib), None)
+							if value is not None:
+								elem.set(key, value)
+					handleElement(localName(elem.tag), elem, [parent.get('id') for parent in path])
+		return size
+
+
+	def readSpecText(self, attrib, content, defaultFill):
+		'''
+			return a text of the spec from the attributes and content of a svg text node
+		'''
+		text = {'text': content or '', 'x': parseNumber(attrib['x']), 'y': parseNumber(attrib['y'])}
+		if attrib.get('font-size'):
+			text['fontSize'] = parseNumber(attrib['font-size'])
+		if attrib.get('fill') and attrib['fill'] != defaultFill:
+			text['fill'] = attrib['fill']
+		if attrib.get('text-anchor', 'middle') != 'middle':
+			text['anchor'] = attrib['text-anchor']
+		return text
+
+
+	########################################################################
+
+
+	def readMicroProcessor(self, zipFile, fzp, spec):
+		pins = []			# [name, x, y]
+		texts = []			# [parent id, text node attributes]
+		rects = []
+		radius = []
+		background = []
+
+		def handleMain(tag, elem, groupIds):
+			if tag == 'circle' and elem.get('id', '').endswith('pin'):
+				pins.append([elem.get('id')[:-len('pin')], parseNumber(elem.get('cx')), parseNumber(elem.get('cy'))])
+				radius.append(float(elem.get('r')))
+			elif tag == 'rect' and 'background' in groupIds:
+				background.append(elem.get('fill'))
+			elif tag == 'rect' and groupIds[-1] in ['texts', 'graphics']:
+				rects.append({'parent': groupIds[-1], 'x': parseNumber(elem.get('x')), 'y': parseNumber(elem.get('y')),
+					'w': parseNumber(elem.get('width')), 'h': parseNumber(elem.get('height')), 'color': elem.get('fill')})
+			elif tag == 'text' and groupIds[-1] in ['texts', 'graphics']:
+				texts.append([groupIds[-1], dict(elem.attrib), elem.text])
+
+		unit, width, height = self.readSvg(zipFile, fzp['views']['breadboardView'][0], handleMain)
+		if not pins:
+			raise Exception(self.m_path + ': no pins found in the breadboard view')
+		pinDist = round(radius[0] / self.s_microRadiusFactor, 6)
+		spec.update({'unit': unit, 'width': width, 'height': height, 'pinDist': pinDist})
+
+		# the pin names written by writeMainSvg() are no texts of the spec
+		pinPositions = set((name, x) for name, x, _ in pins)
+		textColor = '#000000'
+		specTexts = []
+		for parent, attrib, content in texts:
+			if parent == 'texts' and (content, parseNumber(attrib['x'])) in pinPositions:
+				textColor = attrib.get('fill', textColor)
+				continue
+			specTexts.append([parent, attrib, content])
+		spec['mainColors'] = [background[0] if background else '#f0f0f0', textColor]
+		spec['rects'] = rects
+		spec['texts'] = []
+		for parent, attrib, content in specTexts:
+			text = self.readSpecText(attrib, content, textColor)
+			text['parent'] = parent
+			spec['texts'].append(text)
+
+		# pin types and other references (connector id root differs from the name, e.g. GND-2 => GND)
+		pinTypes = dict()
+		references = dict()
+		for conn in fzp['connectors']:
+			idRoot = conn['id'][len('connector'):] if conn['id'].startswith('connector') else conn['id']
+			pinTypes[idRoot] = conn['type'] or 'male'
+			if conn['name'] != idRoot:
+				references[idRoot] = conn['name']
+
+		positions = self.readSchematic(zipFile, fzp, spec, pinDist)
+		spec['pinRows'] = self.getPinRows(pins, pinDist, pinTypes, references, positions)
+
+		# buses, without those that only join the other references
+		referenceGroups = dict()
+		for idRoot, name in references.items():
+			referenceGroups.setdefault(name, set([name])).add(idRoot)
+		referenceSets = list(referenceGroups.values())
+		spec['buses'] = []
+		for _, members in fzp['buses']:
+			names = [member[len('connector'):] if member.startswith('connector') else member for member in members]
+			if set(names) not in referenceSets:
+				spec['buses'].append(names)
+
+		iconTexts = []
+
+		def handleIcon(tag, elem, groupIds):
+			if tag == 'text':
+				iconTexts.append(self.readSpecText(elem.attrib, elem.text, '#000000'))
+
+		self.readSvg(zipFile, fzp['views']['iconView'][0], handleIcon)
+		spec['icon'] = {'texts': iconTexts}
+
+
+	def readSchematic(self, zipFile, fzp, spec, pinDist):
+		'''
+			read the schematic size into spec and return the dict pin name => schematic position (e.g. r5)
+		'''
+		lines = []
+		interior = []
+
+		def handleSchematic(tag, elem, groupIds):
+			if tag == 'line' and elem.get('id', '').endswith('pin'):
+				lines.append([elem.get('id')[:-len('pin')], float(elem.get('x1')), float(elem.get('y1'))])
+			elif tag == 'rect' and elem.get('class') == 'interior rect':
+				interior.append([float(elem.get('x')), float(elem.get('y'))])
+
+		_, width, height = self.readSvg(zipFile, fzp['views']['schematicView'][0], handleSchematic)
+		if not interior:
+			raise Exception(self.m_path + ': no interior rect found in the schematic view')
+		outerX, outerY = interior[0]
+		spec['schematic'] = {
+			'width': round((width - 2 * outerX) / pinDist),
+			'height': round((height - 2 * outerY) / pinDist),
+			'outer': round(outerX / pinDist)
+		}
+		positions = dict()
+		for name, x1, y1 in lines:
+			if isClose(x1, 0):
+				positions[name] = 'l' + str(round((y1 - outerY) / pinDist))
+			elif isClose(x1, width):
+				positions[name] = 'r' + str(round((y1 - outerY) / pinDist))
+			elif isClose(y1, 0):
+				positions[name] = 't' + str(round((x1 - outerX) / pinDist))
+			elif isClose(y1, height):
+				positions[name] = 'b' + str(round((x1 - outerX) / pinDist))
+		return positions
+
+
+	def getPinRows(self, pins, pinDist, pinTypes, references, positions):
+		'''
+			Split the pins (in the order of the breadboard view) into straight rows with equal steps.
+			Missing steps become unused pins
+		'''
+		rows = []
+		row = None
+		for name, x, y in pins:
+			if name in references:
+				position = 'o' + references[name]
+			elif name in positions:
+				position = positions[name]
+			else:
+				raise Exception(self.m_path + ': no schematic position for pin ' + name)
+			pin = [name, position]
+			if row is not None:
+				numSteps = self.getRowSteps(row, x, y, pinDist)
+				if numSteps is not None:
+					row['pins'].extend([None, None] for _ in range(numSteps - 1))
+					row['pins'].append(pin)
+					row['last'] = [x, y]
+					continue
+			row = {'name': 'row' + str(len(rows) + 1), 'x': x, 'y': y, 'distX': pinDist, 'distY': 0,
+				'pinType': pinTypes.get(name, 'male'), 'pins': [pin], 'last': [x, y], 'direction': None}
+			rows.append(row)
+
+		for row in rows:
+			if row.pop('direction') == 'y':
+				row['distX'], row['distY'] = 0, row['distX']
+			del row['last']
+		return rows
+
+
+	def getRowSteps(self, row, x, y, pinDist):
+		'''
+			return the number of steps from the last pin of the row to (x, y), None if it does not fit
+		'''
+		lastX, lastY = row['last']
+		dx = x - lastX
+		dy = y - lastY
+		if isClose(dy, 0) and dx > 0 and row['direction'] in [None, 'x']:
+			direction, distance = 'x', dx
+		elif isClose(dx, 0) and dy > 0 and row['direction'] in [None, 'y']:
+			direction, distance = 'y', dy
+		else:
+			return None
+		if row['direction'] is None and not isClose(distance / pinDist, round(distance / pinDist), 0.001):
+			row['distX'] = round(distance, 6)		# an own step width
+		step = row['distX']
+		numSteps = round(distance / step)
+		if numSteps < 1 or not isClose(distance, numSteps * step):
+			return None
+		row['direction'] = direction
+		return numSteps
+
+
+	########################################################################
+
+
+	def readBreadBoard(self, zipFile, fzp, spec):
+		sockets = dict()		# row name => dict index => [x, y]
+		numbers = []			# y of the numbering texts
+		iconTexts = []
+		radius = []
+		useSymbol = []
+
+		def handleMain(tag, elem, groupIds):
+			if tag == 'circle' and 'femaleSocket' in groupIds:
+				radius.append(float(elem.get('r')))
+				return
+			if tag == 'use':
+				useSymbol.append(True)
+				match = re.fullmatch(r'translate\(([-\d.]+),([-\d.]+)\)', elem.get('transform', ''))
+				if match is None:
+					return
+				x, y = float(match.group(1)), float(match.group(2))
+			elif tag == 'circle':
+				radius.append(float(elem.get('r')))
+				x, y = float(elem.get('cx')), float(elem.get('cy'))
+			elif tag == 'text' and (elem.text or '').strip().isdigit():
+				numbers.append(float(elem.get('y')))
+				return
+			else:
+				return
+			match = re.fullmatch(r'(\D+)(\d+)pin', groupIds[-1] or '')
+			if match is not None:
+				sockets.setdefault(match.group(1), dict())[int(match.group(2))] = [x, y]
+
+		unit, width, height = self.readSvg(zipFile, fzp['views']['breadboardView'][0], handleMain)
+		if not sockets:
+			raise Exception(self.m_path + ': no sockets found in the breadboard view')
+		pinDist = round(radius[0] / self.s_microRadiusFactor, 6)
+
+		outerNames = set(busId[1:] for busId, _ in fzp['buses'] if busId.startswith('o') and busId[1:] in sockets)
+		innerNames = [name for name in sockets if name not in outerNames]
+		numPins = max(max(sockets[name]) for name in (innerNames or list(sockets)))
+		firstRow = sockets[sorted(sockets)[0]]
+		firstIndex = min(firstRow)
+		left = round(firstRow[firstIndex][0] - firstIndex * pinDist, 6)
+		numberingYs = [round(y - pinDist * 0.5, 6) for y in numbers]
+
+		def hasNumbering(y):
+			return any(isClose(y, numberingY) for numberingY in numberingYs)
+
+		rowYs = sorted([next(iter(sockets[name].values()))[1], name] for name in sockets)
+		rows = []
+		top = None
+		runningY = None
+		ii = 0
+		while ii < len(rowYs):
+			y, name = rowYs[ii]
+			if len(name) != 1:
+				raise Exception(self.m_path + ': only single letter row names are supported: ' + name)
+			if name in outerNames:
+				if ii + 1 >= len(rowYs) or rowYs[ii + 1][1] not in outerNames:
+					raise Exception(self.m_path + ': outer rows must come in pairs: ' + name)
+				rows.append({'outer': name + rowYs[ii + 1][1]})
+				rowTop = y - pinDist
+				rowEnd = y + 3 * pinDist
+				ii += 2
+			else:
+				names = name
+				lastY = y
+				ii += 1
+				while ii < len(rowYs) and rowYs[ii][1] not in outerNames and isClose(rowYs[ii][0], lastY + pinDist):
+					lastY, nextName = rowYs[ii]
+					names += nextName
+					ii += 1
+				numbersBefore = hasNumbering(y - pinDist)
+				numbersAfter = hasNumbering(lastY + pinDist)
+				rows.append({'inner': names, 'numbersBefore': numbersBefore, 'numbersAfter': numbersAfter})
+				rowTop = y - pinDist if numbersBefore else y
+				rowEnd = lastY + pinDist * (2 if numbersAfter else 1)
+			if top is None:
+				top = round(rowTop, 6)
+			elif not isClose(rowTop, runningY):
+				raise Exception(self.m_path + ': rows with gaps between them are not supported')
+			runningY = rowEnd
+
+		busGroups = []
+		for busId, members in fzp['buses']:
+			if busId.startswith('i') and members and all(re.fullmatch(r'\D+1', member) for member in members):
+				busGroups.append([member[:-1] for member in members])
+
+		def handleIcon(tag, elem, groupIds):
+			if tag == 'text':
+				iconTexts.append(elem.text or '')
+
+		self.readSvg(zipFile, fzp['views']['iconView'][0], handleIcon)
+
+		spec.update({'unit': unit, 'width': width, 'height': height, 'numPins': numPins, 'pinDist': pinDist,
+			'left': left, 'top': top, 'rows': rows, 'busGroups': busGroups})
+		if iconTexts:
+			spec['iconText'] = iconTexts[0]
+		if useSymbol:
+			spec['socketSymbol'] = True
+
+
+########################################################################
+########################################################################
+
+
+def findFzpzFiles(paths):
+	'''
+		return all fzpz files given directly or found (recursively) in the given folders
+	'''
+	ret = []
+	for path in paths:
+		if os.path.isdir(path):
+			for folder, _, files in os.walk(path):
+				ret.extend(os.path.join(folder, name) for name in sorted(files) if name.endswith('.fzpz'))
+		else:
+			ret.append(path)
+	return ret
+
+
+def regenerateFzpz(path, outRoot, specFolder=None):
+	'''
+		import one fzpz file and generate the part again in outRoot (runs inside of a worker process).
+		If specFolder is given, the recovered spec is written there as <fileNameRoot>.json.
+		Report success or failure as a dict
+	'''
+	start = time.perf_counter()
+	result = {'fzpz': path, 'part': None, 'ok': False, 'error': None}
+	try:
+		spec = FzpzImporter(path).getSpec()
+		result['part'] = spec['fileNameRoot']
+		if specFolder is not None:
+			if not os.path.isdir(specFolder):
+				os.makedirs(specFolder, exist_ok=True)
+			result['spec'] = os.path.join(specFolder, spec['fileNameRoot'] + '.json')
+			with open(result['spec'], 'w', encoding='utf-8') as specFile:
+				json.dump(spec, specFile, indent='\t')
+		PartSpec(spec, path).build(outRoot)
+		result['ok'] = True
+	except Exception as exc:
+		result['error'] = str(exc) or type(exc).__name__
+		result['traceback'] = traceback.format_exc()
+	result['seconds'] = round(time.perf_counter() - start, 3)
+	return result
+
+
+def regenerateParts(paths, outRoot, specFolder=None, numProcesses=None, reportFunc=None):
+	'''
+		Import all given fzpz files (or those in the given folders) and generate them again
+		on a process pool, see regenerateFzpz(). reportFunc(result) is called for each part.
+		Return the list of result dicts in the order of the files
+	'''
+	results = []
+	with ProcessPoolExecutor(max_workers=numProcesses) as pool:
+		futures = [pool.submit(regenerateFzpz, path, outRoot, specFolder) for path in findFzpzFiles(paths)]
+		for future in futures:
+			result = future.result()
+			if reportFunc is not None:
+				reportFunc(result)
+			results.append(result)
+	return results
@@ -18,10 +18,36 @@
 '''
 
 
+import io
 import os
+import re
+import sys
+import json
+import math
+import time
+import queue
+import shutil
+import atexit
+import cProfile
+import hashlib
+import functools
+import threading
+import tracemalloc
 import xml.etree.ElementTree as ET
-from xml.dom import minidom
-from zipfile import ZipFile, ZIP_DEFLATED
+from itertools import chain
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED, ZIP_STORED
+
+try:
+	import numpy		# optional, only needed for the array geometry of big breadboards
+except ImportError:
+	numpy = None
+
+try:
+	from fontTools.ttLib import TTFont		# optional, measures the installed font for the label layout
+except ImportError:
+	TTFont = None
 
 
 ########################################################################
@@ -33,6 +59,8 @@ class Location:
 	'''
 		The location of a pin on the part
 	'''
+	__slots__ = ('m_x', 'm_y', 'm_name')
+
 	def __init__(self, x, y, name):
 		self.m_x = self.round(x)
 		self.m_y = self.round(y)
@@ -58,6 +86,8 @@ class MicroPin(Location):
 		- Position r5 means e.g. on the right side at the 5th grid point
 		- Position oGND means, is represented by the pin with name "GND"
 	'''
+	__slots__ = ('m_schemLoc', 'm_schemPos', 'm_pinType')
+
 	def __init__(self, name, position, pinType='male'):
 		super().__init__(-1, -1, name)
 		self.m_schemLoc = None
@@ -75,12 +105,74 @@ class MicroPin(Location):
 
 
 
+##############################################################
+##############################################################
+
+class AffineTransform:
+	'''
+		A 2d affine transform [a, b, c, d, e, f] like the svg matrix():
+		x' = a*x + c*y + e, y' = b*x + d*y + f. It is applied to whole batches of points,
+		vectorized if numpy is available (then in rare halfway cases the last digit may differ)
+	'''
+
+	def __init__(self, matrix=(1, 0, 0, 1, 0, 0)):
+		self.m_matrix = list(matrix)
+
+
+	@classmethod
+	def rotation(cls, angle, x=0, y=0):
+		'''
+			rotate by angle degrees (clockwise on the screen, as svg y grows downwards), then move to (x, y)
+		'''
+		if angle % 90 == 0:
+			cos, sin = [[1, 0], [0, 1], [-1, 0], [0, -1]][int(angle // 90) % 4]		# exact
+		else:
+			cos, sin = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+		return cls([cos, sin, -sin, cos, x, y])
+
+
+	def then(self, other):
+		'''
+			return the transform doing self first, then other
+		'''
+		a, b, c, d, e, f = self.m_matrix
+		A, B, C, D, E, F = other.m_matrix
+		return AffineTransform([A*a + C*b, B*a + D*b, A*c + C*d, B*c + D*d, A*e + C*f + E, B*e + D*f + F])
+
+
+	def apply(self, xs, ys):
+		'''
+			return [xs, ys] of the transformed points as lists, rounded like all coordinates
+		'''
+		a, b, c, d, e, f = self.m_matrix
+		digits = FritzingPart.s_roundingSize
+		if numpy is not None:
+			xs = numpy.asarray(xs, dtype=numpy.float64)
+			ys = numpy.asarray(ys, dtype=numpy.float64)
+			# + 0.0 turns -0.0 into 0.0
+			return [(numpy.round(a*xs + c*ys + e, digits) + 0.0).tolist(), (numpy.round(b*xs + d*ys + f, digits) + 0.0).tolist()]
+		return [[round(a*x + c*y + e, digits) + 0.0 for x, y in zip(xs, ys)],
+			[round(b*x + d*y + f, digits) + 0.0 for x, y in zip(xs, ys)]]
+
+
+	@classmethod
+	def getGridPoints(cls, num, numColumns, pitchX, pitchY):
+		'''
+			return [xs, ys] of num points in a grid of numColumns columns, filled row by row from (0, 0)
+		'''
+		if numpy is not None:
+			indices = numpy.arange(num)
+			return [indices % numColumns * pitchX, indices // numColumns * pitchY]
+		return [[ii % numColumns * pitchX for ii in range(num)], [ii // numColumns * pitchY for ii in range(num)]]
+
+
 ##############################################################
 ##############################################################
 
 class LocationList:
 	'''
-		A list of locations
+		A list of locations. The locations are computed once (on first usage) and then shared,
+		so they must not be modified by the caller
 	'''
 
 
@@ -91,6 +183,7 @@ class LocationList:
 		self.m_dx = dx
 		self.m_dy = dy
 		self.m_num = num
+		self.m_locations = None		# computed by getLocations()
 
 
 	def round(self, num):
@@ -98,15 +191,30 @@ class LocationList:
 
 
 	def getLocations(self):
-		ret = []
-		curX = self.m_x
-		curY = self.m_y
-		for ii in range(self.m_num):
-			locName = self.m_name + str(ii)
-			ret.append(Location(curX, curY, locName))
-			curX += self.m_dx
-			curY += self.m_dy
-		return ret
+		if self.m_locations is None:
+			ret = []
+			curX = self.m_x
+			curY = self.m_y
+			for ii in range(self.m_num):
+				locName = self.m_name + str(ii)
+				ret.append(Location(curX, curY, locName))
+				curX += self.m_dx
+				curY += self.m_dy
+			self.m_locations = ret
+		return self.m_locations
+
+
+	def getLocation(self, index):
+		return self.getLocations()[index]
+
+
+	def iterLocations(self, indices):
+		'''
+			yield the locations with the given indices
+		'''
+		locs = self.getLocations()
+		for idx in indices:
+			yield locs[idx]
 
 
 	def dump(self):
@@ -119,155 +227,1595 @@ class LocationList:
 ##############################################################
 
 
-class FritzingPart:
+class LocationView:
 	'''
-		Contains the common functionality of
-		- Breadboard generator and
-		- MicroprocessorGenerator
+		A lightweight location handed out by ArrayLocationList (no own rounding)
 	'''
-	# some static common settings
-	s_roundingSize = 3		# for rounding of coordinates
-	s_fontFamily = 'DroidSans'
-	s_fontSize = 1.62		# for mm
-	s_usedFontSize = 0		# will be calculated
-	s_textFill = '#000000'	# '#202020'
-	s_scaleFactor = 1		# for mm, recalculated for in
+	__slots__ = ('m_x', 'm_y', 'm_name')
 
-	# describes the first socket svg path for mm(usage m<1 point>c<3 points>c<3 points>)
-	# will be recalculated for in
-	s_socketRestPartMM1 = [
-		-0.844, 0,											# first m
-		0, -0.466,    0.377, -0.844,    0.844, -0.844,		# first c
-		0.466, 0,     0.844, 0.377,     0.844, 0.844 		# 2nd c
-	]
+	def __init__(self, x, y, name):
+		self.m_x = x
+		self.m_y = y
+		self.m_name = name
 
-	# describes the 2nd socket svg path for mm (usage m<1 point>c<3 points>c<3 points>)
-	# will be recalculated for in
-	s_socketRestPartMM2 = [
-		0.844, 0,											# first m
-		0, 0.466,     -0.377, 0.844,    -0.844, 0.844,		# first c
-		-0.466, 0,    -0.844, -0.377,   -0.844, -0.844 		# 2nd c
+
+	def dump(self):
+		print(str(self.m_x) + ', ' + str(self.m_y))
+
+
+class ArrayLocationList(LocationList):
+	'''
+		A list of locations held in numpy arrays, for very big breadboards.
+		Coordinates are accumulated, rounded and filtered vectorized; LocationView objects
+		are only created when single locations are requested.
+		numpy rounds halfway cases by scaling, so in rare cases the last digit may differ
+		from LocationList
+	'''
+
+	def __init__(self, name, x, y, dx, dy, num):
+		if numpy is None:
+			raise Exception('ArrayLocationList needs numpy')
+		super().__init__(name, x, y, dx, dy, num)
+		self.m_xs = self.accumulate(self.m_x, dx, num)
+		self.m_ys = self.accumulate(self.m_y, dy, num)
+
+
+	@classmethod
+	def accumulate(cls, start, step, num):
+		'''
+			the rounded coordinates start, start+step, ... (summed up like LocationList does)
+		'''
+		values = numpy.full(num, step, dtype=numpy.float64)
+		if num > 0:
+			values[0] = start
+		return numpy.round(numpy.add.accumulate(values), FritzingPart.s_roundingSize)
+
+
+	def getLocations(self):
+		'''
+			return newly created views for all locations (not cached)
+		'''
+		return list(self.iterLocations(range(self.m_num)))
+
+
+	def getLocation(self, index):
+		if index < 0:
+			index += self.m_num
+		return LocationView(float(self.m_xs[index]), float(self.m_ys[index]), self.m_name + str(index))
+
+
+	def iterLocations(self, indices):
+		indices = numpy.asarray(indices, dtype=numpy.int64)
+		name = self.m_name
+		for idx, x, y in zip(indices.tolist(), self.m_xs[indices].tolist(), self.m_ys[indices].tolist()):
+			yield LocationView(x, y, name + str(idx))
+
+
+class StreamingLocationList(LocationList):
+	'''
+		A list of locations that is never held: every iteration sums up the coordinates again
+		(exactly like LocationList) and hands out new Location objects, so the memory stays
+		constant for any number of locations (see FritzingBreadBoard.setStreamingMode())
+	'''
+
+	def getLocations(self):
+		'''
+			return newly created locations (not cached)
+		'''
+		return list(self.iterLocations(range(self.m_num)))
+
+
+	def getLocation(self, index):
+		if index < 0:
+			index += self.m_num
+		return next(self.iterLocations([index]))
+
+
+	def iterLocations(self, indices):
+		'''
+			yield the locations with the given indices, which must be ascending
+		'''
+		curX = self.m_x
+		curY = self.m_y
+		ii = 0
+		for idx in indices:
+			while ii < idx:
+				curX += self.m_dx
+				curY += self.m_dy
+				ii += 1
+			yield Location(curX, curY, self.m_name + str(idx))
+
+
+##############################################################
+##############################################################
+
+
+class FontMetrics:
+	'''
+		The text widths for the label layout. By default the advance widths (in em) come from the built
+		in DroidSans table (also for other families, it is close to most sans fonts), so a part is laid out
+		the same on every machine. If measured, they are read once from the installed ttf file of the
+		family by fontTools (optional, the built in table if it is missing). The tables are cached
+	'''
+	# advance widths of DroidSans for the characters ' ' to '~' in 1/2048 em
+	s_droidSansWidths = [
+		532, 547, 821, 1323, 1171, 1653, 1466, 453, 606, 606, 1120, 1171, 502, 659, 545, 752,
+		1171, 1171, 1171, 1171, 1171, 1171, 1171, 1171, 1171, 1171, 545, 545, 1171, 1171, 1171, 879,
+		1841, 1296, 1327, 1292, 1493, 1139, 1057, 1491, 1511, 571, 547, 1257, 1098, 1849, 1544, 1595,
+		1233, 1595, 1266, 1124, 1143, 1511, 1194, 1882, 1153, 1126, 1165, 690, 752, 690, 1100, 879,
+		1212, 1139, 1237, 975, 1237, 1122, 694, 1104, 1237, 518, 518, 1075, 518, 1876, 1237, 1212,
+		1237, 1237, 836, 977, 723, 1237, 1024, 1532, 1061, 1024, 879, 856, 1128, 856, 1171
 	]
+	s_defaultWidth = 0.6		# em, for characters missing in the table
+	s_fontFolders = ['/usr/share/fonts', '/usr/local/share/fonts', os.path.expanduser('~/.fonts'),
+		'/Library/Fonts', 'C:/Windows/Fonts']
+	s_tables = dict()			# (font family, measured) => dict character => width in em
+	s_tableHashes = dict()		# (font family, measured) => hash of the table, see getTableHash()
 
-	s_femaleSocketRestPath1 = ''		# will be set according to mm or in
-	s_femaleSocketRestPath2 = ''		# will be set according to mm or in
 
-	def __init__(self, m_mmOrInch, folder, filenameRoot, width, height, distX, distY=None):
+	@classmethod
+	def getWidthTable(cls, fontFamily, measured=False):
+		key = (fontFamily, measured)
+		table = cls.s_tables.get(key)
+		if table is None:
+			table = cls.readFontFile(fontFamily) if measured else None
+			if table is None:
+				table = {chr(32 + ii): width / 2048.0 for ii, width in enumerate(cls.s_droidSansWidths)}
+			cls.s_tables[key] = table
+		return table
+
+
+	@classmethod
+	def getTableHash(cls, fontFamily, measured=False):
 		'''
-			mmOrInch:		mm or in
-			folder:			where to output files
-			filenameRoot:	used to create all output file names
+			identifies the width table in use (an input of the incremental build)
 		'''
-		m_mmOrInch = 'in' if m_mmOrInch == 'inch' else m_mmOrInch
-		if not m_mmOrInch in ['mm', 'in']:
-			raise Exception('first Argument must be mm or in')
-		self.m_mmOrInch = m_mmOrInch
-		self.adaptm_mmOrInch(m_mmOrInch)
+		key = (fontFamily, measured)
+		if key not in cls.s_tableHashes:
+			table = cls.getWidthTable(fontFamily, measured)
+			cls.s_tableHashes[key] = hashlib.sha256(repr(sorted(table.items())).encode('utf-8')).hexdigest()
+		return cls.s_tableHashes[key]
 
-		self.m_outFolder = folder
-		if not os.path.exists(folder):
-			os.mkdir(folder)
-		self.m_filenameRoot = filenameRoot
 
-		self.m_locationLists = dict()		# dict name => LocationList
-		self.m_width = self.round(width)	# in mm or in
-		self.m_height = self.round(height)	# in mm or in
-		self.m_distX = distX				# pin distance horizontally
-		if distY is None:
-			distY = distX
-		self.m_distY = distY
+	@classmethod
+	def readFontFile(cls, fontFamily):
+		'''
+			return the width table of the installed font, or None
+		'''
+		if TTFont is None:
+			return None
+		path = cls.findFontFile(fontFamily)
+		if path is None:
+			return None
+		font = TTFont(path, lazy=True)
+		try:
+			cmap = font.getBestCmap()
+			if cmap is None:
+				return None		# no unicode cmap
+			scale = 1.0 / font['head'].unitsPerEm
+			metrics = font['hmtx'].metrics
+			return {chr(code): metrics[glyph][0] * scale for code, glyph in cmap.items()}
+		finally:
+			font.close()
 
-		self.m_svgRoot = None				# xml node, used for all svg files
-		self.m_mainNode = None				# main group in svg root
 
-		# the fpz stuff
-		self.m_fzpBuses = []
-		self.m_fzpRoot = None				# xml root node
-		self.m_fzpConnectors = None
-		self.m_fzpBusesNode = None			# xml buses man node
+	@classmethod
+	def findFontFile(cls, fontFamily):
+		names = [fontFamily.lower() + '.ttf', fontFamily.lower() + '-regular.ttf']
+		for folder in cls.s_fontFolders:
+			for root, _, files in os.walk(folder):
+				for name in files:
+					if name.lower() in names:
+						return os.path.join(root, name)
+		return None
+
+
+	@classmethod
+	def getTextWidth(cls, text, fontSize, fontFamily, measured=False):
+		table = cls.getWidthTable(fontFamily, measured)
+		return fontSize * sum(table.get(char, cls.s_defaultWidth) for char in text)
+
+
+class LabelLayout:
+	'''
+		Places labels without collisions: a label gets the first of its candidate positions where
+		its box overlaps no placed label and no obstacle (e.g. a pin). If there is none, its font
+		is shrunk step by step. The boxes are held in a uniform grid of cellSize, so each check only
+		looks at the boxes of the few cells it covers: near linear time for any number of pins
+	'''
+	s_ascent = 0.75			# height of a text above its baseline, in font sizes
+	s_descent = 0.25		# below its baseline
+	s_shrinkSteps = [1.0, 0.9, 0.8, 0.7]
+
+	def __init__(self, cellSize, fontFamily, measured=False):
+		self.m_cellSize = cellSize
+		self.m_fontFamily = fontFamily
+		self.m_measured = measured		# widths of the installed font, see FontMetrics
+		self.m_cells = dict()			# (column, row) => boxes [left, top, right, bottom]
+		self.m_numOverlaps = 0			# labels placed although they overlap
+
+
+	def getCells(self, box):
+		size = self.m_cellSize
+		for column in range(math.floor(box[0] / size), math.floor(box[2] / size) + 1):
+			for row in range(math.floor(box[1] / size), math.floor(box[3] / size) + 1):
+				yield (column, row)
+
+
+	def addObstacle(self, box):
+		for cell in self.getCells(box):
+			self.m_cells.setdefault(cell, []).append(box)
+
+
+	def isFree(self, box):
+		for cell in self.getCells(box):
+			for other in self.m_cells.get(cell, ()):
+				if box[0] < other[2] and other[0] < box[2] and box[1] < other[3] and other[1] < box[3]:
+					return False
+		return True
+
+
+	def getTextBox(self, text, x, y, fontSize, anchor='middle'):
+		'''
+			the box of a text at baseline y
+		'''
+		width = FontMetrics.getTextWidth(text, fontSize, self.m_fontFamily, self.m_measured)
+		left = x - width * 0.5 if anchor == 'middle' else (x - width if anchor == 'end' else x)
+		return [left, y - self.s_ascent * fontSize, left + width, y + self.s_descent * fontSize]
+
+
+	def place(self, text, x, candidates, fontSize, anchor='middle'):
+		'''
+			return [y, fontSize] for the label: the first free candidate baseline y with the largest font
+			that fits. If nothing fits, the first candidate with the smallest font (counted in m_numOverlaps)
+		'''
+		for scale in self.s_shrinkSteps:
+			size = fontSize if scale == 1.0 else FritzingPart.round(fontSize * scale)
+			for y in candidates:
+				box = self.getTextBox(text, x, y, size, anchor)
+				if self.isFree(box):
+					self.addObstacle(box)
+					return [y, size]
+		self.m_numOverlaps += 1
+		self.addObstacle(self.getTextBox(text, x, candidates[0], size, anchor))
+		return [candidates[0], size]
+
+
+##############################################################
+##############################################################
+
+
+class ConnectivityResolver:
+	'''
+		Union-find over pin names: every connect() merges the given names into one bus.
+		getBuses() returns the partition, buses and their members in the order
+		the names were first seen
+	'''
+
+	def __init__(self):
+		self.m_parent = dict()		# name => parent name (roots point to themselves)
+		self.m_seq = dict()			# name => order of first appearance
+
+
+	def add(self, name):
+		if name not in self.m_parent:
+			self.m_parent[name] = name
+			self.m_seq[name] = len(self.m_seq)
+
+
+	def find(self, name):
+		parent = self.m_parent
+		while parent[name] != name:
+			parent[name] = parent[parent[name]]		# path halving
+			name = parent[name]
+		return name
+
+
+	def union(self, name1, name2):
+		'''
+			merge the buses of both names, the earlier seen root stays root
+		'''
+		root1 = self.find(name1)
+		root2 = self.find(name2)
+		if root1 == root2:
+			return
+		if self.m_seq[root2] < self.m_seq[root1]:
+			root1, root2 = root2, root1
+		self.m_parent[root2] = root1
+
+
+	def connect(self, names):
+		for name in names:
+			self.add(name)
+		for name in names[1:]:
+			self.union(names[0], name)
+
+
+	def getBuses(self):
+		buses = dict()		# root => members
+		for name in self.m_seq:
+			buses.setdefault(self.find(name), []).append(name)
+		return list(buses.values())
+
+
+##############################################################
+##############################################################
+
+
+class PrettyXmlWriter:
+	'''
+		Writes an ElementTree node indented into a text stream in one pass.
+		The output is the same as the former tostring -> minidom -> toprettyxml
+		round trip produced (namespace declarations first, single texts inline,
+		empty elements closed with />)
+	'''
+	s_escapes = [('&', '&amp;'), ('<', '&lt;'), ('"', '&quot;'), ('>', '&gt;')]
+	s_flushSize = 256		# children a growing element collects before they are written
+
+	def __init__(self, stream, indent='\t', newl='\n', collectIds=False, compactDigits=None, fragments=None):
+		'''
+			With compactDigits the svg trees are compacted (see SvgCompactor) and written without whitespace.
+			fragments: the written text of shared elements, see SharedCache
+		'''
+		if compactDigits is not None:
+			indent = newl = ''
+		self.m_write = stream.write
+		self.m_indent = indent
+		self.m_newl = newl
+		self.m_ids = set() if collectIds else None		# the written id attributes
+		self.m_compactDigits = compactDigits
+		self.m_fragments = fragments
+
+
+	@classmethod
+	def escape(cls, text):
+		for char, entity in cls.s_escapes:
+			if char in text:
+				text = text.replace(char, entity)
+		return text
+
+
+	def writeDeclaration(self, encoding='utf-8'):
+		self.m_write('<?xml version="1.0" encoding="' + encoding + '"?>' + self.m_newl)
+
+
+	def writeDocument(self, root):
+		'''
+			write the declaration and the whole tree below root
+		'''
+		self.writeDeclaration()
+		if self.m_compactDigits is not None:
+			SvgCompactor.compact(root, self.m_compactDigits, self.m_fragments)
+		self.writeElement(root, '')
+
+
+	def writeGrowingDocument(self, root, steps):
+		'''
+			write the declaration and root, while steps creates the tree below it (see writeGrowingElement())
+		'''
+		self.writeDeclaration()
+		self.writeGrowingElement(root, '', steps)
+
+
+	def writeStartTag(self, elem, indent, close=False):
+		'''
+			write the opening tag of elem, namespace declarations first (as minidom did)
+		'''
+		escape = self.escape
+		parts = [indent, '<', elem.tag]
+		items = elem.attrib.items()
+		if self.m_ids is not None and 'id' in elem.attrib:
+			self.m_ids.add(elem.attrib['id'])
+		others = []
+		for key, value in items:
+			if key == 'xmlns' or key.startswith('xmlns:'):
+				parts.append(' ' + key + '="' + escape(value) + '"')
+			else:
+				others.append(' ' + key + '="' + escape(value) + '"')
+		parts.extend(others)
+		parts.append('/>' + self.m_newl if close else '>')
+		self.m_write(''.join(parts))
+
+
+	def writeEndTag(self, tag, indent):
+		self.m_write(indent + '</' + tag + '>' + self.m_newl)
+
+
+	def writeElement(self, elem, indent, useFragments=True):
+		'''
+			write elem and all its children, indent is the current indentation string
+		'''
+		if useFragments and self.m_fragments is not None:
+			fragment = self.m_fragments.get(id(elem))
+			if fragment is not None:
+				self.writeFragment(elem, indent, fragment)
+				return
+		write = self.m_write
+		newl = self.m_newl
+		text = elem.text
+		if len(elem) == 0:
+			if text:
+				self.writeStartTag(elem, indent)
+				write(self.escape(text) + '</' + elem.tag + '>' + newl)
+			else:
+				self.writeStartTag(elem, indent, True)
+			return
+		self.writeStartTag(elem, indent)
+		write(newl)
+		subIndent = indent + self.m_indent
+		if text:
+			write(subIndent + self.escape(text) + newl)
+		for child in elem:
+			self.writeElement(child, subIndent)
+			if child.tail:
+				write(subIndent + self.escape(child.tail) + newl)
+		self.writeEndTag(elem.tag, indent)
+
+
+	def writeFragment(self, elem, indent, fragment):
+		'''
+			write a shared element by its text, which is created on first usage per indentation
+		'''
+		key = (indent, self.m_newl)
+		entry = fragment.get(key)
+		if entry is None:
+			write, ids = self.m_write, self.m_ids
+			parts = []
+			self.m_write = parts.append
+			self.m_ids = set()
+			try:
+				self.writeElement(elem, indent, False)
+				entry = [''.join(parts), self.m_ids]
+			finally:
+				self.m_write, self.m_ids = write, ids
+			fragment[key] = entry
+		self.m_write(entry[0])
+		if self.m_ids is not None:
+			self.m_ids.update(entry[1])
+
+
+	def writeGrowingElement(self, elem, indent, steps):
+		'''
+			Write elem while the iterator steps adds its children (streaming mode, see
+			FritzingPart.writeGrowingXml()). Written children are removed from elem, so it never
+			holds more than s_flushSize of them. A step may yield (child, childSteps) for
+			the child it just appended last, which then grows (and is written) the same way.
+			The output is the same as writeElement() of the complete tree
+		'''
+		write = self.m_write
+		subIndent = indent + self.m_indent
+		started = False
+		for step in steps:
+			if step is None and len(elem) < self.s_flushSize:
+				continue
+			if not started:
+				if self.m_compactDigits is not None:
+					SvgCompactor.formatNumbers(elem, self.m_compactDigits)
+				self.writeStartTag(elem, indent)
+				write(self.m_newl)
+				if elem.text:
+					write(subIndent + self.escape(elem.text) + self.m_newl)
+				started = True
+			if step is None:
+				self.writeChildren(elem, subIndent)
+				del elem[:]
+				continue
+			child, childSteps = step
+			if len(elem) == 0 or elem[-1] is not child:
+				raise Exception('a growing child must be the last child of its parent: ' + child.tag)
+			self.writeChildren(elem[:-1], subIndent)
+			del elem[:]
+			self.writeGrowingElement(child, subIndent, childSteps)
+			if child.tail:
+				write(subIndent + self.escape(child.tail) + self.m_newl)
+		if not started:
+			if self.m_compactDigits is not None:
+				SvgCompactor.compact(elem, self.m_compactDigits, self.m_fragments)
+			self.writeElement(elem, indent)
+		else:
+			self.writeChildren(elem, subIndent)
+			self.writeEndTag(elem.tag, indent)
+		del elem[:]
+
+
+	def writeChildren(self, children, indent):
+		'''
+			write the (complete) children
+		'''
+		for child in children:
+			if self.m_compactDigits is not None:
+				SvgCompactor.compact(child, self.m_compactDigits, self.m_fragments)
+			self.writeElement(child, indent)
+			if child.tail:
+				self.m_write(indent + self.escape(child.tail) + self.m_newl)
+
+
+class SvgCompactor:
+	'''
+		Makes svg trees smaller without changing the drawing (see FritzingPart.setCompactSvgMode()):
+		- presentation attributes shared by all children of a group are set once on the group
+		  (e.g. fill and font of all texts), svg inherits them
+		- numbers are written as short as possible (5.0 -> 5, 0.250 -> .25) with the given digits
+	'''
+	s_inheritedAttributes = ['fill', 'stroke', 'stroke-width', 'font-family', 'font-size', 'text-anchor']
+	s_textAttributes = ['font-family', 'font-size', 'text-anchor']		# do not matter for shapes
+	s_shapeTags = ['rect', 'circle', 'ellipse', 'line', 'path', 'polygon', 'polyline']
+	s_connectorAttributes = ['stroke-width']		# stay on elements with an id (fritzing reads them from connectors)
+	s_numberAttributes = ['x', 'y', 'width', 'height', 'cx', 'cy', 'r', 'rx', 'ry', 'x1', 'y1', 'x2', 'y2',
+		'stroke-width', 'font-size']
+	s_numberListAttributes = ['d', 'transform', 'points']
+	s_numberPattern = re.compile(r'-?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+
+	@classmethod
+	def compact(cls, root, digits, fragments=None):
+		'''
+			compact the tree below root in place. Shared elements already written (see SharedCache)
+			are compacted already and left out
+		'''
+		cls.formatTree(root, digits, fragments)
+		cls.hoistAttributes(root, fragments)
+
+
+	@classmethod
+	def formatTree(cls, elem, digits, fragments):
+		if fragments and fragments.get(id(elem)):
+			return
+		cls.formatNumbers(elem, digits)
+		for child in elem:
+			cls.formatTree(child, digits, fragments)
+
+
+	@classmethod
+	def formatNumber(cls, value, digits):
+		text = '%.*f' % (digits, value)
+		if '.' in text:
+			text = text.rstrip('0').rstrip('.')
+		if text.startswith('0.'):
+			text = text[1:]
+		elif text.startswith('-0.'):
+			text = '-' + text[2:]
+		return '0' if text == '-0' else text
+
+
+	@classmethod
+	def formatNumbers(cls, elem, digits):
+		'''
+			shorten the numbers in the attributes of elem
+		'''
+		attrib = elem.attrib
+		for key in cls.s_numberAttributes:
+			value = attrib.get(key)
+			if value is not None:
+				try:
+					attrib[key] = cls.formatNumber(float(value), digits)
+				except ValueError:
+					pass		# e.g. with unit
+		for key in cls.s_numberListAttributes:
+			value = attrib.get(key)
+			if value is not None:
+				value = cls.s_numberPattern.sub(lambda match: cls.formatNumber(float(match.group()), digits), value)
+				if key == 'd':
+					value = re.sub(r'[ ,]+(?=-)', '', value)		# a minus sign separates the numbers
+				attrib[key] = value
+
+
+	@classmethod
+	def hoistAttributes(cls, elem, fragments=None):
+		'''
+			move the attributes all children of a group agree on (bottom up) to the group
+		'''
+		if fragments and fragments.get(id(elem)):
+			return
+		children = list(elem)
+		for child in children:
+			cls.hoistAttributes(child, fragments)
+		if elem.tag != 'g' or len(children) < 2:
+			return
+		for key in cls.s_inheritedAttributes:
+			if key in elem.attrib:
+				continue
+			if key in cls.s_textAttributes:
+				carriers = [child for child in children if child.tag not in cls.s_shapeTags]
+			else:
+				carriers = children
+			if len(carriers) < 2:
+				continue
+			value = carriers[0].get(key)
+			if value is None or any(child.get(key) != value for child in carriers):
+				continue
+			elem.set(key, value)
+			for child in carriers:
+				if key not in cls.s_connectorAttributes or 'id' not in child.attrib:
+					del child.attrib[key]
+
+
+##############################################################
+##############################################################
+
+
+class OutputSink:
+	'''
+		Base of all destinations for the generated files. A file is addressed by its
+		bare file name (e.g. ArduinoMicro_00Main.svg) and by its member name inside
+		of the fzpz archive (e.g. svg.breadboard.ArduinoMicro_00Main.svg)
+	'''
+	# compression profiles of the fzpz file: compression type and level
+	s_compressionProfiles = {
+		'stored': [ZIP_STORED, None],		# fastest, for iterating
+		'fast': [ZIP_DEFLATED, 1],			# e.g. for CI
+		'default': [ZIP_DEFLATED, None],
+		'max': [ZIP_DEFLATED, 9],			# smallest, for releases
+	}
+	s_fixedDateTime = (1980, 1, 1, 0, 0, 0)	# timestamp of all members of reproducible fzpz files
+
+	def __init__(self):
+		self.m_compression = 'default'
+		self.m_reproducible = False
+		self.m_writeLock = None		# for sinks that cannot write several files at the same time (see FritzingMicroProcessor.buildAll())
+
+
+	def setZipOptions(self, compression='default', reproducible=False):
+		'''
+			Select the compression profile (stored, fast, default, max) of the fzpz file.
+			If reproducible, all members get fixed timestamps and permissions, so identical
+			parts give byte identical fzpz files
+		'''
+		if compression not in self.s_compressionProfiles:
+			raise Exception('unknown compression profile: ' + str(compression))
+		self.m_compression = compression
+		self.m_reproducible = reproducible
+
+
+	def getZipInfo(self, memberName):
+		'''
+			return the ZipInfo of a member according to the zip options (the level: see getZipLevel())
+		'''
+		if self.m_reproducible:
+			info = ZipInfo(memberName, date_time=self.s_fixedDateTime)
+			info.create_system = 3						# unix
+		else:
+			info = ZipInfo(memberName, date_time=time.localtime()[:6])
+		info.external_attr = 0o644 << 16				# -rw-r--r--, as the members always had
+		info.compress_type = self.s_compressionProfiles[self.m_compression][0]
+		return info
+
+
+	def getZipLevel(self):
+		'''
+			return the compression level of the zip options (None: the default of the compression)
+		'''
+		return self.s_compressionProfiles[self.m_compression][1]
+
+
+	def writeZipMember(self, zipFile, memberName, data):
+		'''
+			add one member to the zip file according to the zip options
+		'''
+		zipFile.writestr(self.getZipInfo(memberName), data, compresslevel=self.getZipLevel())
+
+
+	def addZipMember(self, zipFile, memberName, filename):
+		'''
+			add a written file as member to the zip file, a missing file is left out
+		'''
+		data = self.read(filename)
+		if data is not None:
+			self.writeZipMember(zipFile, memberName, data)
+
+
+	def openText(self, filename, memberName):
+		'''
+			return a context manager yielding a text stream for the file
+		'''
+		raise Exception('openText not implemented in ' + type(self).__name__)
+
+
+	def openBinary(self, filename):
+		'''
+			return a context manager yielding a binary stream for the file
+		'''
+		raise Exception('openBinary not implemented in ' + type(self).__name__)
+
+
+	def read(self, filename):
+		'''
+			return the bytes of an already written file, or None
+		'''
+		return None
+
+
+	def getSize(self, filename, memberName=None):
+		'''
+			return the size in bytes of a written file, or None if not known
+		'''
+		data = self.read(filename)
+		return None if data is None else len(data)
+
+
+	def writeFzpz(self, filename, members):
+		'''
+			Combine the written files into the fzpz archive.
+			members is a list of [memberName, filename]; missing files are left out
+		'''
+		with self.openBinary(filename) as stream, ZipFile(stream, 'w') as myZip:
+			for memberName, memberFile in members:
+				self.addZipMember(myZip, memberName, memberFile)
+
+
+class FileSink(OutputSink):
+	'''
+		Writes all files into a folder (the classic behaviour)
+	'''
+
+	def __init__(self, folder):
+		super().__init__()
+		self.m_folder = folder
+		if not os.path.exists(folder):
+			os.mkdir(folder)
+
+
+	def getFullPath(self, filename):
+		return self.m_folder + '/' + filename
+
+
+	def openText(self, filename, memberName):
+		return self.openAtomic(self.getFullPath(filename), 'w')
+
+
+	def openBinary(self, filename):
+		return self.openAtomic(self.getFullPath(filename), 'wb')
+
+
+	@contextmanager
+	def openAtomic(self, fullName, mode):
+		'''
+			write into a temporary file next to fullName, which replaces fullName only when it is
+			complete, so a crash never leaves a truncated file
+		'''
+		tmpName = fullName + '.' + str(os.getpid()) + '.' + str(threading.get_ident()) + '.tmp'
+		if 'b' in mode:
+			stream = open(tmpName, mode)
+		else:
+			stream = open(tmpName, mode, encoding='utf-8', newline='')
+		try:
+			with stream:
+				yield stream
+		except BaseException:
+			os.remove(tmpName)
+			raise
+		os.replace(tmpName, fullName)
+
+
+	def getSize(self, filename, memberName=None):
+		fullName = self.getFullPath(filename)
+		return os.path.getsize(fullName) if os.path.exists(fullName) else None
+
+
+	def read(self, filename):
+		fullName = self.getFullPath(filename)
+		if not os.path.exists(fullName):
+			return None
+		with open(fullName, 'rb') as theFile:
+			return theFile.read()
+
+
+	def addZipMember(self, zipFile, memberName, filename):
+		'''
+			copy the file into the zip file chunk by chunk, so a huge file is never held in memory
+		'''
+		fullName = self.getFullPath(filename)
+		if not os.path.exists(fullName):
+			return
+		level = self.getZipLevel()
+		if level is not None and not hasattr(ZipInfo, 'compress_level'):
+			# before python 3.13 only writestr() takes the level of a member with a ZipInfo
+			super().addZipMember(zipFile, memberName, filename)
+			return
+		info = self.getZipInfo(memberName)
+		if level is not None:
+			info.compress_level = level
+		info.file_size = os.path.getsize(fullName)		# selects zip64 for huge files
+		with open(fullName, 'rb') as source, zipFile.open(info, 'w') as member:
+			shutil.copyfileobj(source, member)
+
+
+class WriteBehindSink(FileSink):
+	'''
+		Writes the files into a folder on a background thread, so rendering and disk i/o overlap
+		(e.g. on slow network volumes). A finished file waits in a bounded queue (the renderer
+		waits when maxPending files are waiting) and is written atomically like by FileSink.
+		writeFzpz() and flush() wait for all pending files, errors of the thread are raised there.
+		close() also ends the thread (PartSpec.build() calls it), sinks still open at exit are closed then.
+		Each file is collected in memory first, so use a FileSink for streaming mode
+	'''
+	s_openSinks = set()				# the sinks with a running thread, closed at exit
+	s_openSinksLock = threading.Lock()
+
+	def __init__(self, folder, maxPending=8):
+		super().__init__(folder)
+		self.m_queue = queue.Queue(maxPending)
+		self.m_pending = dict()				# file name => data not yet written
+		self.m_pendingLock = threading.Lock()
+		self.m_thread = None				# started with the first file
+		self.m_threadLock = threading.Lock()	# the views of buildAll() enqueue from several threads
+		self.m_error = None					# first exception of the thread
+
+
+	def __reduce__(self):
+		# a copy in another process (see FritzingMicroProcessor.buildAll()) writes directly
+		return (FileSink, (self.m_folder,))
+
+
+	@contextmanager
+	def openText(self, filename, memberName):
+		stream = io.StringIO()
+		yield stream
+		self.enqueue(filename, stream.getvalue().encode('utf-8'))
+
+
+	@contextmanager
+	def openBinary(self, filename):
+		stream = io.BytesIO()
+		yield stream
+		self.enqueue(filename, stream.getvalue())
+
+
+	def enqueue(self, filename, data):
+		self.raiseError()
+		with self.m_threadLock:
+			# one thread at a time, so close() cannot end the writer between the start and the put
+			if self.m_thread is None:
+				self.m_thread = threading.Thread(target=self.runWriter, name='WriteBehindSink', daemon=True)
+				self.m_thread.start()
+				with self.s_openSinksLock:
+					self.s_openSinks.add(self)
+			with self.m_pendingLock:
+				self.m_pending[filename] = data
+			self.m_queue.put([filename, data])
+
+
+	def runWriter(self):
+		'''
+			the background thread: write the queued files one after the other, until close()
+		'''
+		while True:
+			item = self.m_queue.get()
+			if item is None:
+				self.m_queue.task_done()
+				return
+			filename, data = item
+			try:
+				if self.m_error is None:
+					with self.openAtomic(self.getFullPath(filename), 'wb') as stream:
+						stream.write(data)
+			except Exception as exc:
+				self.m_error = exc
+			finally:
+				with self.m_pendingLock:
+					if self.m_pending.get(filename) is data:
+						del self.m_pending[filename]
+				self.m_queue.task_done()
+
+
+	def flush(self):
+		'''
+			wait until all pending files are written
+		'''
+		self.m_queue.join()
+		self.raiseError()
+
+
+	def close(self):
+		'''
+			write all pending files and end the thread (a later file starts a new one)
+		'''
+		with self.m_threadLock:
+			thread = self.m_thread
+			if thread is not None:
+				self.m_queue.put(None)
+				thread.join()
+				self.m_thread = None
+				with self.s_openSinksLock:
+					self.s_openSinks.discard(self)
+		self.raiseError()
+
+
+	@classmethod
+	def closeAll(cls):
+		'''
+			close the sinks that are still open (at exit)
+		'''
+		with cls.s_openSinksLock:
+			sinks = list(cls.s_openSinks)
+		for sink in sinks:
+			sink.close()
+
+
+	def raiseError(self):
+		'''
+			raise the error of the thread (once)
+		'''
+		error = self.m_error
+		if error is not None:
+			self.m_error = None
+			raise Exception('writing behind failed: ' + str(error))
+
+
+	def getSize(self, filename, memberName=None):
+		with self.m_pendingLock:
+			data = self.m_pending.get(filename)
+		return len(data) if data is not None else super().getSize(filename, memberName)
+
+
+	def read(self, filename):
+		with self.m_pendingLock:
+			data = self.m_pending.get(filename)
+		return data if data is not None else super().read(filename)
+
+
+	def writeFzpz(self, filename, members):
+		self.flush()
+		super().writeFzpz(filename, members)
+		self.flush()
+
+
+atexit.register(WriteBehindSink.closeAll)
+
+
+class MemorySink(OutputSink):
+	'''
+		Keeps all files as bytes in the dict m_files (file name => bytes),
+		including the fzpz archive
+	'''
+
+	def __init__(self):
+		super().__init__()
+		self.m_files = dict()
+
+
+	@contextmanager
+	def openText(self, filename, memberName):
+		stream = io.StringIO()
+		yield stream
+		self.m_files[filename] = stream.getvalue().encode('utf-8')
+
+
+	@contextmanager
+	def openBinary(self, filename):
+		stream = io.BytesIO()
+		yield stream
+		self.m_files[filename] = stream.getvalue()
+
+
+	def read(self, filename):
+		return self.m_files.get(filename)
+
+
+class ZipSink(OutputSink):
+	'''
+		Writes every file directly as a member into the fzpz archive (in the order of generation).
+		If reproducible, the members are kept until writeFzpz() and written in the order of the fzpz
+		members, so the views rendered at the same time (buildAll()) give the same archive.
+		target is a file name or a binary stream. writeFzpz() closes the archive
+	'''
+
+	def __init__(self, target, compression='default', reproducible=False):
+		super().__init__()
+		self.m_zip = ZipFile(target, 'w')
+		self.m_writeLock = threading.Lock()		# one open member at a time
+		self.m_members = dict()					# member name => bytes, kept until writeFzpz() if reproducible
+		self.setZipOptions(compression, reproducible)
+
+
+	def setZipOptions(self, compression='default', reproducible=False):
+		super().setZipOptions(compression, reproducible)
+		self.m_zip.compression, self.m_zip.compresslevel = self.s_compressionProfiles[compression]
+
+
+	@contextmanager
+	def openText(self, filename, memberName):
+		if self.m_reproducible:
+			# fixed member attributes and order, so the file is collected first
+			stream = io.StringIO()
+			yield stream
+			self.m_members[memberName] = stream.getvalue().encode('utf-8')
+			return
+		with self.m_zip.open(memberName, 'w') as member:
+			stream = io.TextIOWrapper(member, encoding='utf-8', newline='')
+			yield stream
+			stream.flush()
+			stream.detach()
+
+
+	def getSize(self, filename, memberName=None):
+		if memberName in self.m_members:
+			return len(self.m_members[memberName])
+		if memberName is None or self.m_zip.fp is None:
+			return None
+		return self.m_zip.getinfo(memberName).file_size
+
+
+	def writeFzpz(self, filename, members):
+		order = [memberName for memberName, memberFile in members if memberName in self.m_members]
+		for memberName in order + sorted(set(self.m_members) - set(order)):
+			self.writeZipMember(self.m_zip, memberName, self.m_members.pop(memberName))
+		self.m_zip.close()
+
+
+class StdoutSink(OutputSink):
+	'''
+		Writes all text files one after the other to stdout (e.g. for piping one view)
+	'''
+	s_lock = threading.Lock()		# all parts share stdout
+
+	def __init__(self):
+		super().__init__()
+		self.m_writeLock = self.s_lock
+
+
+	@contextmanager
+	def openText(self, filename, memberName):
+		yield sys.stdout
+		sys.stdout.flush()
+
+
+	def writeFzpz(self, filename, members):
+		raise Exception('a fzpz file cannot be written to stdout')
+
+
+##############################################################
+##############################################################
+
+
+class BuildInstrumentation:
+	'''
+		Collects per stage (writeMainSvg, createFzp, ...) of a part build: wall time,
+		tracemalloc peak (if traceMemory), the number of created svg/xml elements
+		(addRect, addCircle, addText, ...) and the bytes written per output file.
+		If profileFolder is given, every stage is run under cProfile and dumped there.
+		Use part.setInstrumentation(collector) and collector.writeReport(path)
+	'''
+	s_lock = threading.Lock()		# the views of buildAll() count from several threads
+
+	def __init__(self, traceMemory=False, profileFolder=None):
+		self.m_traceMemory = traceMemory
+		self.m_profileFolder = profileFolder
+		self.m_partName = None
+		self.m_stages = []				# finished stages (dicts)
+		self.m_openStages = []			# stack of running stages
+		self.m_elements = dict()		# element kind => count over all stages
+		self.m_bytesWritten = dict()	# file name => bytes
+		self.m_concurrent = False		# True while stages run in parallel threads: only the enclosing stage is measured
+
+
+	def countElement(self, kind):
+		with self.s_lock:
+			self.m_elements[kind] = self.m_elements.get(kind, 0) + 1
+			if self.m_openStages:
+				elements = self.m_openStages[-1]['elements']
+				elements[kind] = elements.get(kind, 0) + 1
+
+
+	def addBytesWritten(self, filename, numBytes):
+		with self.s_lock:
+			self.m_bytesWritten[filename] = numBytes
+			if self.m_openStages:
+				self.m_openStages[-1]['bytesWritten'][filename] = numBytes
+
+
+	def mergeReport(self, report):
+		'''
+			add the stages measured elsewhere (e.g. in another process, see getReport())
+		'''
+		with self.s_lock:
+			self.m_stages.extend(report['stages'])
+			for kind, count in report['elements'].items():
+				self.m_elements[kind] = self.m_elements.get(kind, 0) + count
+			self.m_bytesWritten.update(report['bytesWritten'])
+
+
+	@contextmanager
+	def stage(self, name):
+		'''
+			measure everything done inside of the with block as the stage name
+		'''
+		stage = {'stage': name, 'seconds': None, 'elements': dict(), 'bytesWritten': dict()}
+		startedTracing = self.m_traceMemory and not tracemalloc.is_tracing()
+		if startedTracing:
+			tracemalloc.start()
+		elif self.m_traceMemory:
+			if self.m_openStages:
+				self.keepPeak(self.m_openStages[-1])		# the reset below must not lose the peak of the enclosing stage
+			tracemalloc.reset_peak()
+		profile = cProfile.Profile() if self.m_profileFolder else None
+		self.m_openStages.append(stage)
+		start = time.perf_counter()
+		if profile is not None:
+			profile.enable()
+		try:
+			yield stage
+		finally:
+			if profile is not None:
+				profile.disable()
+			stage['seconds'] = round(time.perf_counter() - start, 6)
+			self.m_openStages.pop()
+			if self.m_traceMemory:
+				self.keepPeak(stage)
+				if startedTracing:
+					tracemalloc.stop()
+				elif self.m_openStages:
+					self.keepPeak(self.m_openStages[-1])
+			if profile is not None:
+				profName = (self.m_partName or 'part') + '_' + name + '_' + str(len(self.m_stages)) + '.prof'
+				profile.dump_stats(os.path.join(self.m_profileFolder, profName))
+			self.m_stages.append(stage)
+
+
+	def keepPeak(self, stage):
+		'''
+			merge the tracemalloc peak since its last reset into the peak of the stage
+		'''
+		stage['peakBytes'] = max(stage.get('peakBytes', 0), tracemalloc.get_traced_memory()[1])
+
+
+	def getReport(self):
+		'''
+			return all measurements as a json compatible dict
+		'''
+		return {
+			'part': self.m_partName,
+			'totalSeconds': round(sum(stage['seconds'] for stage in self.m_stages), 6),
+			'elements': self.m_elements,
+			'bytesWritten': self.m_bytesWritten,
+			'stages': self.m_stages
+		}
+
+
+	def writeReport(self, path):
+		with open(path, 'w', encoding='utf-8') as reportFile:
+			json.dump(self.getReport(), reportFile, indent='\t')
+
+
+def instrumentedStage(method):
+	'''
+		decorator for the methods of FritzingPart that are measured as a stage by its BuildInstrumentation
+	'''
+	@functools.wraps(method)
+	def wrapper(self, *args, **kwargs):
+		if self.m_instrumentation is None or self.m_instrumentation.m_concurrent:
+			return method(self, *args, **kwargs)
+		with self.m_instrumentation.stage(method.__name__):
+			return method(self, *args, **kwargs)
+	return wrapper
+
+
+##############################################################
+##############################################################
+
+
+class UnitContext:
+	'''
+		The unit dependent settings of a part (mm or in): scale factor, font size and
+		the socket paths. Immutable, one shared instance per unit (see forUnit()),
+		so parts in different units can be built at the same time
+	'''
+	s_contexts = dict()		# unit => UnitContext
+
+	def __init__(self, mmOrInch):
+		scale = 1.0 if mmOrInch == 'mm' else 1 / 25.4
+		setter = super().__setattr__
+		setter('m_mmOrInch', mmOrInch)
+		setter('m_scaleFactor', scale)
+		setter('m_usedFontSize', FritzingPart.round(FritzingPart.s_fontSize * scale))
+		setter('m_femaleSocketRestPath1', FritzingPart.adaptPath(FritzingPart.s_socketRestPartMM1, 'mcc', scale))
+		setter('m_femaleSocketRestPath2', FritzingPart.adaptPath(FritzingPart.s_socketRestPartMM2, 'mcc', scale))
+
+
+	def __setattr__(self, name, value):
+		raise Exception('UnitContext is immutable')
+
+
+	def __reduce__(self):
+		# a part sent to another process uses the shared context there, too
+		return (UnitContext.forUnit, (self.m_mmOrInch,))
+
+
+	@classmethod
+	def forUnit(cls, mmOrInch):
+		'''
+			return the shared context for mm or in
+		'''
+		ret = cls.s_contexts.get(mmOrInch)
+		if ret is None:
+			ret = cls.s_contexts.setdefault(mmOrInch, cls(mmOrInch))
+		return ret
+
+
+class SharedCache:
+	'''
+		What the parts of a family (variants of one spec, see fritzing.FritzingFamily) compute only once:
+		- the location lists: a shorter list with the same start and steps is a prefix of the longest one
+		- elements depending on a few inputs only (sockets, connectors, inner buses), created once per key
+		  and appended to every part using them, see FritzingPart.addSharedElement()
+		- the written text of these elements, per indentation (see PrettyXmlWriter.writeFragment())
+		The elements must not be changed after their creation. Not thread safe: one family build at a time
+	'''
+
+	def __init__(self):
+		self.m_elements = dict()		# key => shared element
+		self.m_fragments = dict()		# id of a shared element => {(indent, newl): [text, ids]}
+		self.m_locationLists = dict()	# (name, x, y, dx, dy) => the longest LocationList
+		self.m_numShared = 0			# elements taken from the cache instead of created
+
+
+	def getElement(self, key, createFunc):
+		'''
+			return the element for key, created by createFunc(parent) with a temporary parent on first usage
+		'''
+		elem = self.m_elements.get(key)
+		if elem is None:
+			elem = createFunc(ET.Element('shared'))
+			self.m_elements[key] = elem
+			self.m_fragments[id(elem)] = dict()
+		else:
+			self.m_numShared += 1
+		return elem
+
+
+	def getLocationList(self, name, x, y, dx, dy, num):
+		key = (name, x, y, dx, dy)
+		longest = self.m_locationLists.get(key)
+		if longest is None or longest.m_num < num:
+			longest = LocationList(name, x, y, dx, dy, num)
+			self.m_locationLists[key] = longest
+		if longest.m_num == num:
+			return longest
+		ret = LocationList(name, x, y, dx, dy, num)
+		ret.m_locations = longest.getLocations()[:num]
+		return ret
+
+
+##############################################################
+##############################################################
+
+
+class FritzingPart:
+	'''
+		Contains the common functionality of
+		- Breadboard generator and
+		- MicroprocessorGenerator
+	'''
+	# some static common settings
+	s_roundingSize = 3		# for rounding of coordinates
+	s_fontFamily = 'DroidSans'
+	s_fontSize = 1.62		# for mm, scaled for in (see UnitContext)
+	s_textFill = '#000000'	# '#202020'
+	s_libraryFingerprint = None		# hash of this source file, see getLibraryFingerprint()
+	s_incrementalByDefault = False	# parts with an output folder build incrementally (used by watch mode)
+
+	# describes the first socket svg path for mm(usage m<1 point>c<3 points>c<3 points>)
+	# will be recalculated for in (see UnitContext)
+	s_socketRestPartMM1 = [
+		-0.844, 0,											# first m
+		0, -0.466,    0.377, -0.844,    0.844, -0.844,		# first c
+		0.466, 0,     0.844, 0.377,     0.844, 0.844 		# 2nd c
+	]
+
+	# describes the 2nd socket svg path for mm (usage m<1 point>c<3 points>c<3 points>)
+	# will be recalculated for in (see UnitContext)
+	s_socketRestPartMM2 = [
+		0.844, 0,											# first m
+		0, 0.466,     -0.377, 0.844,    -0.844, 0.844,		# first c
+		-0.466, 0,    -0.844, -0.377,   -0.844, -0.844 		# 2nd c
+	]
+
+
+	# the members of the fzpz file: prolog and postfix
+	s_fzpzMembers = [
+		['svg.breadboard.', 'Main.svg'],
+		['svg.icon.', 'Icon.svg'],
+		['svg.schematic.', 'Schematic.svg'],
+		['svg.pcb.', 'Pcb.svg'],
+		['part.', '.fzp']
+	]
+
+	def __init__(self, m_mmOrInch, folder, filenameRoot, width, height, distX, distY=None):
+		'''
+			mmOrInch:		mm or in
+			folder:			where to output files (None: keep them in memory, see setOutputSink())
+			filenameRoot:	used to create all output file names
+		'''
+		m_mmOrInch = 'in' if m_mmOrInch == 'inch' else m_mmOrInch
+		if not m_mmOrInch in ['mm', 'in']:
+			raise Exception('first Argument must be mm or in')
+		self.m_mmOrInch = m_mmOrInch
+		self.m_unit = UnitContext.forUnit(m_mmOrInch)	# scale, font size and socket paths
+
+		self.m_outFolder = folder
+		self.m_outputSink = FileSink(folder) if folder is not None else MemorySink()
+		self.m_filenameRoot = filenameRoot
+
+		self.m_locationLists = dict()		# dict name => LocationList
+		self.m_locationsByName = None		# dict location name => Location, see getLocationNamed()
+		self.m_locationListClass = LocationList	# ArrayLocationList after useArrayGeometry()
+		self.m_width = self.round(width)	# in mm or in
+		self.m_height = self.round(height)	# in mm or in
+		self.m_distX = distX				# pin distance horizontally
+		if distY is None:
+			distY = distX
+		self.m_distY = distY
+
+		self.m_svgRoot = None				# xml node of the main (breadboard) svg file
+		self.m_iconRoot = None				# xml node of the icon svg file, see createIconRootNode()
+		self.m_mainNode = None				# main group in svg root
+		self.m_useSocketSymbol = False		# True: sockets are <use> references of one symbol in <defs>
+		self.m_compactSvg = False			# True: svg files without whitespace and repeated attributes
+
+		self.m_instrumentation = None		# BuildInstrumentation, see setInstrumentation()
+
+		# incremental build, see setIncrementalBuild()
+		self.m_incremental = self.s_incrementalByDefault and folder is not None
+		self.m_manifest = None				# postfix => hash of the inputs of the written file
+		self.m_pendingHashes = dict()		# postfix => hash of the inputs of the file being written
+		self.m_outputsChanged = False		# True if a file was (re)written in this run
+		self.m_writtenOutputs = []			# postfixes of the files (re)written in this run
+		self.m_holdManifest = False			# True: the manifest is saved by the caller (views built in parallel)
+
+		# the fpz stuff
+		self.m_fzpBuses = []
+		self.m_fzpRoot = None				# xml root node
+		self.m_fzpConnectors = None
+		self.m_fzpBusesNode = None			# xml buses man node
+		self.m_svgIds = dict()				# svg file name => set of its element ids (for checkFzpIntegrity())
+		self.m_checkIntegrity = True		# check connectors and buses before writing the fzp file
+		self.m_streaming = False			# write the growing xml trees while creating them, see writeGrowingXml()
+		self.m_sharedCache = None			# SharedCache of the part family, see setSharedCache()
+
+
+	@classmethod
+	def round(cls, num):
+		return round(num, FritzingPart.s_roundingSize)
+
+
+	@classmethod
+	def adaptPath(cls, numbers, types, scale):
+		'''
+			scale the coodinates in numbers, scale them and combine them to a path, using types as path directives
+			Can handle most everything except arcs (which have values that must not be scaled)
+		'''
+		newNumbers = [cls.round(x * scale) for x in numbers]
+		ret = ''
+		start = 0
+		for theType in types:
+			if theType == 'c':
+				ret += 'c'
+				ret += cls.getCoordsString(newNumbers, start, 6)
+				start += 6
+			elif theType == 'm':
+				ret += 'm'
+				ret += cls.getCoordsString(newNumbers, start, 2)
+				start += 2
+			else:
+				raise Exception('Unhandled path type found: ' + theType)
+		ret = ret.replace('0.0,', '0,')
+		ret = ret.replace('0.0c', '0c')
+		ret = ret.replace('0.0m', '0m')
+		ret = ret.replace(',-', '-')
+		return ret
+
+
+	@classmethod
+	def getCoordsString(cls, numbers, start, numOfCoords):
+		'''
+			build a string using the coords from start in array numbers
+		'''
+		ret = ''
+		for ii in range(numOfCoords):
+			ret += str(numbers[start + ii]) + ','
+		ret = ret[:-1]		# remove last trailing comma
+		return ret
+
+
+	def getFullPathFor(self, postfix):
+		'''
+			return the full path for this postfix
+		'''
+		return self.m_outFolder + '/' + self.getFilenameFor(postfix)
+
+
+	def getFilenameFor(self, postfix):
+		'''
+			return the bare file name for this postfix
+		'''
+		return self.m_filenameRoot + postfix
+
+
+	def getFzpzMemberName(self, postfix):
+		'''
+			return the name of the file for this postfix inside of the fzpz file
+		'''
+		for prolog, memberPostfix in self.s_fzpzMembers:
+			if memberPostfix == postfix:
+				return prolog + self.getFilenameFor(postfix)
+		return self.getFilenameFor(postfix)
+
+
+	def setOutputSink(self, sink):
+		'''
+			Set the destination of all generated files (FileSink, MemorySink, ZipSink, StdoutSink)
+		'''
+		self.m_outputSink = sink
+
+
+	def setInstrumentation(self, instrumentation):
+		'''
+			Measure the build stages with the given BuildInstrumentation (None: switch off)
+		'''
+		if instrumentation is not None:
+			instrumentation.m_partName = self.m_filenameRoot
+		self.m_instrumentation = instrumentation
+
+
+	def countElement(self, kind):
+		if self.m_instrumentation is not None:
+			self.m_instrumentation.countElement(kind)
+
+
+	def setFzpzOptions(self, compression='default', reproducible=False):
+		'''
+			Select the compression profile (stored, fast, default, max) of the fzpz file and
+			whether it is reproducible (byte identical for identical parts), see OutputSink.setZipOptions()
+		'''
+		self.m_outputSink.setZipOptions(compression, reproducible)
+
+
+	def setIncrementalBuild(self, incremental=True):
+		'''
+			If incremental, a file whose inputs (geometry, pins, meta, unit, library version) did not
+			change since the last run is not generated again, and the fzpz file is only written if one
+			of its members changed. The input hashes are kept in <filenameRoot>.manifest.json.
+			Works only with a FileSink
+		'''
+		if incremental and not isinstance(self.m_outputSink, FileSink):
+			raise Exception('incremental build needs a FileSink')
+		self.m_incremental = incremental
+
+
+	def setSharedCache(self, cache):
+		'''
+			Share locations, elements and their written text with the other parts using the same
+			SharedCache (the variants of a part family). Set it before adding pins or rows
+		'''
+		self.m_sharedCache = cache
+
+
+	def addSharedElement(self, parent, key, createFunc):
+		'''
+			Append the element created by createFunc(parent) to parent and return it. With a shared
+			cache it is created only once for all parts with the same key (which must hold all inputs
+			of the element)
+		'''
+		if self.m_sharedCache is None:
+			return createFunc(parent)
+		elem = self.m_sharedCache.getElement(key, createFunc)
+		parent.append(elem)
+		return elem
+
+
+	@classmethod
+	def getLibraryFingerprint(cls):
+		'''
+			hash of this library source, so a new library version rebuilds everything
+		'''
+		if FritzingPart.s_libraryFingerprint is None:
+			with open(__file__, 'rb') as source:
+				FritzingPart.s_libraryFingerprint = hashlib.sha256(source.read()).hexdigest()
+		return FritzingPart.s_libraryFingerprint
 
 
-	@classmethod
-	def round(cls, num):
-		return round(num, FritzingPart.s_roundingSize)
+	def getManifest(self):
+		if self.m_manifest is None:
+			self.m_manifest = dict()
+			manifestPath = self.m_outputSink.getFullPath(self.getFilenameFor('.manifest.json'))
+			if os.path.exists(manifestPath):
+				with open(manifestPath, 'r', encoding='utf-8') as manifestFile:
+					self.m_manifest = json.load(manifestFile)
+		return self.m_manifest
 
 
-	@classmethod
-	def adaptm_mmOrInch(cls, m_mmOrInch):
-		scale = 1.0 if m_mmOrInch == 'mm' else 1 / 25.4
-		#print('using wrong scaling factor !!!')
-		cls.s_scaleFactor = scale
-		cls.s_usedFontSize = cls.round(cls.s_fontSize * scale)
-		cls.s_femaleSocketRestPath1 = cls.adaptPath(cls.s_socketRestPartMM1, 'mcc', scale)
-		cls.s_femaleSocketRestPath2 = cls.adaptPath(cls.s_socketRestPartMM2, 'mcc', scale)
+	def saveManifest(self):
+		# through the sink, so the manifest never lists files that are not written yet
+		with self.m_outputSink.openText(self.getFilenameFor('.manifest.json'), None) as manifestFile:
+			json.dump(self.m_manifest, manifestFile, indent='\t', sort_keys=True)
 
 
-	@classmethod
-	def adaptPath(cls, numbers, types, scale):
+	def getGeometryInputs(self):
 		'''
-			scale the coodinates in numbers, scale them and combine them to a path, using types as path directives
-			Can handle most everything except arcs (which have values that must not be scaled)
+			the part wide inputs of all generated files (extended by the sub classes)
 		'''
-		newNumbers = [cls.round(x * scale) for x in numbers]
-		ret = ''
-		start = 0
-		for theType in types:
-			if theType == 'c':
-				ret += 'c'
-				ret += cls.getCoordsString(newNumbers, start, 6)
-				start += 6
-			elif theType == 'm':
-				ret += 'm'
-				ret += cls.getCoordsString(newNumbers, start, 2)
-				start += 2
-			else:
-				raise Exception('Unhandled path type found: ' + theType)
-		ret = ret.replace('0.0,', '0,')
-		ret = ret.replace('0.0c', '0c')
-		ret = ret.replace('0.0m', '0m')
-		ret = ret.replace(',-', '-')
-		return ret
+		return [self.m_mmOrInch, self.m_filenameRoot, self.m_width, self.m_height, self.m_distX, self.m_distY, self.s_textFill]
 
 
-	@classmethod
-	def getCoordsString(cls, numbers, start, numOfCoords):
+	def getBusInputs(self):
 		'''
-			build a string using the coords from start in array numbers
+			the inputs of the buses in the fzp file
 		'''
-		ret = ''
-		for ii in range(numOfCoords):
-			ret += str(numbers[start + ii]) + ','
-		ret = ret[:-1]		# remove last trailing comma
-		return ret
+		return self.m_fzpBuses
 
 
-	def getFullPathFor(self, postfix):
+	def getFzpInputs(self):
 		'''
-			return the full path for this postfix
+			the part inputs of the connectors and buses in the fzp file
 		'''
-		return self.m_outFolder + '/' + self.getFilenameFor(postfix)
+		return [self.getGeometryInputs(), self.getBusInputs()]
 
 
-	def getFilenameFor(self, postfix):
+	def isUpToDate(self, postfix, inputs):
 		'''
-			return the bare file name for this postfix
+			For incremental builds: return True if the file for postfix was already generated
+			from the same inputs. Otherwise remember the hash of the inputs for writePrettyXml()
 		'''
-		return self.m_filenameRoot + postfix
+		if not self.m_incremental:
+			return False
+		compact = self.m_compactSvg and postfix.endswith('.svg')
+		hashValue = hashlib.sha256(repr([self.getLibraryFingerprint(), postfix, compact, inputs]).encode('utf-8')).hexdigest()
+		self.m_pendingHashes[postfix] = hashValue
+		if self.getManifest().get(postfix) != hashValue:
+			return False
+		return os.path.exists(self.m_outputSink.getFullPath(self.getFilenameFor(postfix)))
 
 
 	def addLocationList(self, name, left, top, dx, dy, num):
 		'''
 			Create a list of num locations in steps of (dx, dy) and store it under the given name
 		'''
-		theList = LocationList(name, left, top, dx, dy, num)
+		if self.m_sharedCache is not None and self.m_locationListClass is LocationList:
+			theList = self.m_sharedCache.getLocationList(name, left, top, dx, dy, num)
+		else:
+			theList = self.m_locationListClass(name, left, top, dx, dy, num)
 		self.m_locationLists[name] = theList
+		self.m_locationsByName = None
+
+
+	def useArrayGeometry(self):
+		'''
+			Hold the locations of all later added lists in numpy arrays (for very big parts).
+			Needs numpy
+		'''
+		if numpy is None:
+			raise Exception('array geometry needs numpy')
+		self.m_locationListClass = ArrayLocationList
 
 
 	def getAllLocationsOf(self, name):
+		'''
+			return the (shared, cached) locations of the list with the given name
+		'''
 		theList = self.m_locationLists[name]
 		return theList.getLocations()
 
 
+	def getLocationAt(self, listName, index):
+		'''
+			return the location with the given index in the named list
+		'''
+		return self.m_locationLists[listName].getLocation(index)
+
+
+	def getLocationNamed(self, name):
+		'''
+			return the location with the given name (e.g. A12) or None
+		'''
+		if self.m_locationsByName is None:
+			index = dict()
+			for locList in self.m_locationLists.values():
+				for loc in locList.getLocations():
+					index[loc.m_name] = loc
+			self.m_locationsByName = index
+		return self.m_locationsByName.get(name)
+
+
 	def dumpLocations(self):
 		for locList in self.m_locationLists.values():
 			locList.dump()
@@ -279,6 +1827,7 @@ class FritzingPart:
 		'''
 		root = self.createSvgRootNode(self.m_width, self.m_height)
 		root.set('enable-background', 'new 0 0 ' + str(self.m_width) + ' ' + str(self.m_height))
+		self.m_svgRoot = root
 
 
 	def createSvgRootNode(self, width, height):
@@ -296,7 +1845,6 @@ class FritzingPart:
 		ret.set('width', str(width) + size)		# fails to show corect buses: width*1.25
 		ret.set('height', str(height) + size)
 		ret.set('viewBox', '0 0 ' + str(width) + ' ' + str(height))
-		self.m_svgRoot = ret
 		return ret
 
 
@@ -310,6 +1858,7 @@ class FritzingPart:
 			add a svg rect with the given parameters.
 		'''
 		#prefix = 'svg:' if useNamespace else ''
+		self.countElement('rect')
 		rect = ET.SubElement(parent, 'rect')
 		rect.set('x', str(x))
 		rect.set('y', str(y))
@@ -320,6 +1869,7 @@ class FritzingPart:
 	
 
 	def addCircle(self, parent, cx, cy, r, strokeWidth, fill, stroke):
+		self.countElement('circle')
 		c = ET.SubElement(parent, 'circle')
 		c.set('cx', str(self.round(cx)))
 		c.set('cy', str(self.round(cy)))
@@ -335,12 +1885,14 @@ class FritzingPart:
 
 
 	def addPath(self, parent, color, d):
+		self.countElement('path')
 		path = ET.SubElement(parent, 'path')
 		path.set('fill', color)
 		path.set('d', d)
 
 
 	def addGroup(self, parent=None, name=None):
+		self.countElement('group')
 		group = ET.SubElement(parent, 'g')
 		if name is not None:
 			group.set('id', name)
@@ -348,6 +1900,7 @@ class FritzingPart:
 
 
 	def addText(self, parent, text, x, y, fill=None, rotation=0, fontSize=0, fontFamily=None, anchor='middle'):
+		self.countElement('text')
 		svgText = ET.SubElement(parent, 'text')
 		svgText.set('x', str(self.round(x)))
 		svgText.set('y', str(self.round(y)))
@@ -358,7 +1911,7 @@ class FritzingPart:
 		fontFamily = fontFamily if fontFamily else self.s_fontFamily
 		svgText.set('font-family', fontFamily)
 
-		fontSize = fontSize if fontSize > 0 else self.s_usedFontSize
+		fontSize = fontSize if fontSize > 0 else self.m_unit.m_usedFontSize
 		svgText.set('font-size', str(fontSize))
 
 		svgText.set('text-anchor', anchor)
@@ -367,6 +1920,7 @@ class FritzingPart:
 	
 
 	def addLine(self, parent, x1, y1, x2, y2, stroke, strokeWidth, id=None):
+		self.countElement('line')
 		svgLine = ET.SubElement(parent, 'line')
 		svgLine.set('x1', str(self.round(x1)))
 		svgLine.set('y1', str(self.round(y1)))
@@ -379,6 +1933,7 @@ class FritzingPart:
 		return svgLine
 
 
+	@instrumentedStage
 	def createFzp(self, moduleId, fritzingVersion, metaDict, tags, properties):
 		'''
 			Create fzp file
@@ -386,6 +1941,9 @@ class FritzingPart:
 			- create the connectors
 			- create buses
 		'''
+		inputs = [self.getFzpInputs(), moduleId, fritzingVersion, list(metaDict.items()), tags, properties]
+		if self.isUpToDate('.fzp', inputs):
+			return
 		module = ET.Element('module')
 		module.set('moduleId', moduleId)
 		module.set('fritzingVersion', fritzingVersion)
@@ -403,35 +1961,183 @@ class FritzingPart:
 
 		self.fzpInitAllViews(module)
 
-		self.m_fzpConnectors = ET.SubElement(module, 'connectors')
-		self.m_fzpBusesNode = ET.SubElement(module, 'buses')
 		self.m_fzpRoot = module
+		self.writeGrowingXml(module, self.iterFzpModule(), '.fzp')
+
+
+	def iterFzpModule(self):
+		'''
+			the steps adding connectors and buses to the fzp module (see writeGrowingXml())
+		'''
+		self.m_fzpConnectors = ET.SubElement(self.m_fzpRoot, 'connectors')
+		yield self.m_fzpConnectors, self.iterFzpConnectors()
+		self.m_fzpBusesNode = ET.SubElement(self.m_fzpRoot, 'buses')
+		yield self.m_fzpBusesNode, self.iterFzpBuses()
+
+
+	def iterFzpConnectors(self):
+		'''
+			the steps creating the connectors of the fzp file. By default one step for all
+		'''
 		self.createFzpConnectors()
-		self.createFzpBuses()
+		yield
 
-		self.writePrettyXml(self.m_fzpRoot, '.fzp')
+
+	def iterFzpBuses(self):
+		'''
+			the steps creating the buses of the fzp file. By default one step for all
+		'''
+		self.createFzpBuses()
+		yield
+
+
+	def checkFzpIntegrity(self, module):
+		'''
+			Verify in linear time, that every bus member is a connector and that every svgId and
+			terminalId of a connector exists in the svg file of its view (views whose svg file is
+			not available are left out). Raise an exception listing the problems
+		'''
+		problems = []
+		viewIds = dict()		# e.g. schematicView => ids of the schematic svg file
+		for view in module.find('views'):
+			layers = view.find('layers')
+			if layers is not None and layers.get('image'):
+				viewIds[view.tag] = self.getSvgIds(layers.get('image').split('/')[-1])
+
+		connectorIds = set()
+		for connector in module.find('connectors'):
+			connId = connector.get('id')
+			if connId in connectorIds:
+				problems.append('duplicate connector id: ' + connId)
+			connectorIds.add(connId)
+			views = connector.find('views')
+			for view in (views if views is not None else []):
+				ids = viewIds.get(view.tag)
+				if ids is None:
+					continue
+				for p in view:
+					for attr in ['svgId', 'terminalId']:
+						svgId = p.get(attr)
+						if svgId is not None and svgId not in ids:
+							problems.append('connector ' + connId + ': ' + attr + ' ' + svgId + ' not found in ' + view.tag)
+
+		for bus in module.find('buses'):
+			for member in bus:
+				if member.get('connectorId') not in connectorIds:
+					problems.append('bus ' + str(bus.get('id')) + ': unknown connector ' + str(member.get('connectorId')))
+
+		if problems:
+			shown = problems[:20]
+			if len(problems) > len(shown):
+				shown.append('... and ' + str(len(problems) - len(shown)) + ' more')
+			raise Exception('fzp check of ' + self.m_filenameRoot + ' failed with ' + str(len(problems)) + ' problems:\n' + '\n'.join(shown))
+
+
+	def getSvgIds(self, filename):
+		'''
+			return the set of element ids of a generated svg file (None if not available).
+			Files written in this run are known, others are read back with iterparse
+		'''
+		if filename not in self.m_svgIds:
+			data = self.m_outputSink.read(filename)
+			if data is None:
+				return None
+			ids = set()
+			for _, elem in ET.iterparse(io.BytesIO(data)):
+				if 'id' in elem.attrib:
+					ids.add(elem.attrib['id'])
+				elem.clear()
+			self.m_svgIds[filename] = ids
+		return self.m_svgIds[filename]
 
 
 	def writePrettyXml(self, root, postfix):
 		'''
-			write the wanted xml file nicely indented - a bit complicated, but works
+			write the wanted xml file nicely indented, in one pass directly from the tree
+		'''
+		self.writeXmlFile(postfix, lambda writer: writer.writeDocument(root))
+
+
+	def writeGrowingXml(self, root, steps, postfix):
+		'''
+			Create the tree below root by the iterator steps (see PrettyXmlWriter.writeGrowingElement())
+			and write it. In streaming mode every part of the tree is written and dropped as soon
+			as it is created, else the whole tree is completed (and the fzp file checked) first
+		'''
+		if self.m_streaming:
+			self.writeXmlFile(postfix, lambda writer: writer.writeGrowingDocument(root, steps))
+			return
+		self.completeElement(root, steps)
+		if postfix == '.fzp' and self.m_checkIntegrity:
+			self.checkFzpIntegrity(root)
+		self.writePrettyXml(root, postfix)
+
+
+	def completeElement(self, elem, steps):
+		'''
+			run all steps creating the children of elem (tree mode of writeGrowingXml())
 		'''
-		rough_string = ET.tostring(root, 'utf-8')
-		reparsed = minidom.parseString(rough_string)
-		pretty = reparsed.toprettyxml(indent="	", newl='\n', encoding='utf-8')
-		with open(self.getFullPathFor(postfix), 'wb') as xmlFile:
-			xmlFile.write(pretty)
+		for step in steps:
+			if step is not None:
+				self.completeElement(*step)
 
 
-	def addBusNode(self, id, connectors):
+	def writeXmlFile(self, postfix, writeFunc):
 		'''
-			Add one bus to the fzp file with given id and connectors list
+			open the file for postfix, let writeFunc(writer) write it by a PrettyXmlWriter and
+			keep track of the written file. The svg ids are collected for checkFzpIntegrity()
+			(not in streaming mode, where the check is left out)
 		'''
-		bus = ET.SubElement(self.m_fzpBusesNode, 'bus')
+		filename = self.getFilenameFor(postfix)
+		memberName = self.getFzpzMemberName(postfix)
+		isSvg = postfix.endswith('.svg')
+		collectIds = isSvg and not self.m_streaming
+		compactDigits = self.s_roundingSize if isSvg and self.m_compactSvg else None
+		sink = self.m_outputSink
+		writeLock = sink.m_writeLock or nullcontext()
+		with writeLock, sink.openText(filename, memberName) as xmlFile:
+			fragments = self.m_sharedCache.m_fragments if self.m_sharedCache is not None else None
+			writer = PrettyXmlWriter(xmlFile, collectIds=collectIds, compactDigits=compactDigits, fragments=fragments)
+			writeFunc(writer)
+		if collectIds:
+			self.m_svgIds[filename] = writer.m_ids
+		self.m_outputsChanged = True
+		self.m_writtenOutputs.append(postfix)
+		if self.m_instrumentation is not None:
+			self.m_instrumentation.addBytesWritten(filename, self.m_outputSink.getSize(filename, memberName))
+		self.storeInputHash(postfix)
+
+
+	def storeInputHash(self, postfix):
+		'''
+			For incremental builds: store the hash computed by isUpToDate() after the file was written
+		'''
+		if self.m_incremental and postfix in self.m_pendingHashes:
+			self.getManifest()[postfix] = self.m_pendingHashes.pop(postfix)
+			if not self.m_holdManifest:
+				self.saveManifest()
+
+
+	def addBusNode(self, id, connectors, parent=None):
+		'''
+			Add one bus to the fzp file (or to parent) with given id and connectors list
+		'''
+		self.countElement('bus')
+		bus = ET.SubElement(self.m_fzpBusesNode if parent is None else parent, 'bus')
 		bus.set('id', id)
+		for _ in self.iterBusMembers(bus, connectors):
+			pass
+		return bus
+
+
+	def iterBusMembers(self, bus, connectors):
+		'''
+			the steps adding the connectors to the bus node, one by one
+		'''
 		for conn in connectors:
 			nodeMember = ET.SubElement(bus, 'nodeMember')
 			nodeMember.set('connectorId', conn)
+			yield
 
 
 	def addSimpleNode(self, parent, tag, text):
@@ -463,59 +2169,112 @@ class FritzingPart:
 			layer.set('layerId', layerId)
 
 
+	@instrumentedStage
 	def writeFzpz(self):
 		'''
 			Write the zipped combination file for installation of the part
 		'''
-		fName = self.getFullPathFor('.fzpz')
-		with ZipFile(fName, 'w') as myZip:
-			self.writeZippedFile(myZip, 'svg.breadboard.', 'Main.svg')
-			self.writeZippedFile(myZip, 'svg.icon.', 'Icon.svg')
-			self.writeZippedFile(myZip, 'svg.schematic.', 'Schematic.svg')
-			self.writeZippedFile(myZip, 'svg.pcb.', 'Pcb.svg')
-			self.writeZippedFile(myZip, 'part.', '.fzp')
+		members = [[prolog + self.getFilenameFor(postfix), self.getFilenameFor(postfix)] for prolog, postfix in self.s_fzpzMembers]
+		if self.m_incremental:
+			manifest = self.getManifest()
+			memberHashes = [manifest.get(postfix) for _, postfix in self.s_fzpzMembers]
+			memberHashes += [self.m_outputSink.m_compression, self.m_outputSink.m_reproducible]
+			if self.isUpToDate('.fzpz', memberHashes) and not self.m_outputsChanged:
+				return
+		self.m_outputSink.writeFzpz(self.getFilenameFor('.fzpz'), members)
+		self.m_outputsChanged = True
+		self.m_writtenOutputs.append('.fzpz')
+		self.storeInputHash('.fzpz')
+		if self.m_instrumentation is not None:
+			filename = self.getFilenameFor('.fzpz')
+			self.m_instrumentation.addBytesWritten(filename, self.m_outputSink.getSize(filename))
 
 
-	def writeZippedFile(self, zipFile, prolog, postfix):
+	def getOutputBytes(self, postfix):
 		'''
-			Add one compressed file the fzpz file
+			return the generated file for this postfix as bytes (None if not available)
 		'''
-		fullName = self.getFullPathFor(postfix)
-		if not os.path.exists(fullName):
-			return
-		destName = prolog + self.m_filenameRoot + postfix
-		zipFile.write(fullName, arcname=destName, compress_type= ZIP_DEFLATED)
+		return self.m_outputSink.read(self.getFilenameFor(postfix))
 
 
 	def createIconRootNode(self):
 		'''
 			For microprocessors the application must draw its own icon file
 		'''
-		ret = self.createSvgRootNode(32, 32)	
-		return ret
+		self.m_iconRoot = self.createSvgRootNode(32, 32)
+		return self.m_iconRoot
 	
 
+	@instrumentedStage
 	def writeOutIconFile(self):
-		self.writePrettyXml(self.m_svgRoot, 'Icon.svg')
+		if self.m_iconRoot is None:
+			self.createIconRootNode()
+		if self.isUpToDate('Icon.svg', [ET.tostring(self.m_iconRoot)]):
+			return
+		self.writePrettyXml(self.m_iconRoot, 'Icon.svg')
+
+
+	def setCompactSvgMode(self, compact=True):
+		'''
+			If compact, the svg files are written without indentation and line breaks, attributes
+			shared by all children of a group (fill, stroke, font, ...) are set once on the group and
+			numbers are as short as s_roundingSize allows (see SvgCompactor). In streaming mode
+			the growing groups (texts, sockets) keep the attributes of their children
+		'''
+		self.m_compactSvg = compact
+
+
+	def setSocketSymbolMode(self, useSymbol=True):
+		'''
+			If useSymbol, the socket artwork is defined once in <defs> and each socket
+			only references it by <use> (much smaller svg files). The socket groups with the
+			connector ids stay the same
+		'''
+		self.m_useSocketSymbol = useSymbol
+
+
+	def addSocketSymbolDefs(self, svgRoot):
+		'''
+			Create the <defs> node holding the socket symbol at (0, 0) as first child of svgRoot
+		'''
+		defs = ET.Element('defs')
+		svgRoot.insert(0, defs)
+		symbol = self.addGroup(defs, 'femaleSocket')
+		self.addPath(symbol, '#e6e6e6', 'M0,0' + self.m_unit.m_femaleSocketRestPath1)
+		self.addPath(symbol, '#bfbfbf', 'M0,0' + self.m_unit.m_femaleSocketRestPath2)
+		self.addCircle(symbol, 0, 0, self.m_pinRadius, self.m_pinRadius/ 5, '#383838', None)
+		return defs
 
 
 	def showOneSvgSocket(self, parent, loc):
 		'''
 			Mostly useful for breadboards, but could also be used by Microprocessors
 		'''
+		key = ('socket', loc.m_name, loc.m_x, loc.m_y, self.m_mmOrInch, self.m_pinRadius, self.m_useSocketSymbol, self.m_compactSvg)
+		return self.addSharedElement(parent, key, lambda theParent: self.createSvgSocket(theParent, loc))
+
+
+	def createSvgSocket(self, parent, loc):
 		id = loc.m_name + 'pin'
 		group = self.addGroup(parent, id)
 
+		if self.m_useSocketSymbol:
+			use = ET.SubElement(group, 'use')
+			use.set('xlink:href', '#femaleSocket')
+			use.set('transform', 'translate(' + str(loc.m_x) + ',' + str(loc.m_y) + ')')
+			return group
+
 		startX = str(loc.m_x)
 		startY = str(loc.m_y)
 
-		d = 'M'+startX + ',' + startY + self.s_femaleSocketRestPath1
+		d = 'M'+startX + ',' + startY + self.m_unit.m_femaleSocketRestPath1
 		self.addPath(group, '#e6e6e6', d)
 
-		d = 'M'+startX + ',' + startY + self.s_femaleSocketRestPath2
+		d = 'M'+startX + ',' + startY + self.m_unit.m_femaleSocketRestPath2
 		self.addPath(group, '#bfbfbf', d)
 
 		self.addCircle(group, loc.m_x, loc.m_y, self.m_pinRadius, self.m_pinRadius/ 5, '#383838', None)
+		return group
 
 
 	def addConnectorBus(self, connectors):
@@ -548,39 +2307,70 @@ class FritzingBreadBoard (FritzingPart):
 		self.m_svgTextsGroup = None		# the svg node holding all texts
 		self.m_electrodeLines = []		# array of red or blue electrode lines (set by application)
 		self.m_busGroups = []			# array denoting the lines which are bussed together (set by application)
+		self.m_outerRowIndices = None	# cached result of getOuterRowIndices()
+		self.m_backgroundColor = '#d9d9d9'
 
 
+	def getGeometryInputs(self):
+		locLists = [[ll.m_name, ll.m_x, ll.m_y, ll.m_dx, ll.m_dy, ll.m_num] for ll in self.m_locationLists.values()]
+		return super().getGeometryInputs() + [self.m_numPinsPerLine, self.m_pinRadius, locLists,
+			self.m_innerRowNames, self.m_outerRowNames, self.m_outerPinGroupsSize, self.m_numberingDiff,
+			self.m_numberingYValues, self.m_electrodeLines, self.m_useSocketSymbol, self.m_locationListClass.__name__,
+			self.m_backgroundColor]
+
+
+	def getBusInputs(self):
+		return self.m_busGroups
+
+
+
+	def iterAllPins(self):
+		'''
+			yield all pins (outer rows first)
+		'''
+		yield from self.iterOuterPins()
+		yield from self.iterInnerPins()
+
+
+	def iterOuterPins(self):
+		'''
+			yield all outer row pins
+		'''
+		for nm in self.m_outerRowNames:
+			yield from self.m_locationLists[nm].iterLocations(self.getOuterRowIndices())
+
+
+	def iterInnerPins(self):
+		'''
+			yield all inner row pins
+		'''
+		indexList = self.getInnerRowIndices()
+		for nm in self.m_innerRowNames:
+			yield from self.m_locationLists[nm].iterLocations(indexList)
+
 
 	def doAllPins(self, theLambda):
 		'''
 			Iterate over all pins, doing theLambda for each
 		'''
-		self.doAllOuterPins(theLambda)
-		self.doAllInnerPins(theLambda)
+		for loc in self.iterAllPins():
+			theLambda(loc)
 
 
 	def doAllOuterPins(self, theLambda):
 		'''
 			Iterate over all outer row pins, doing theLambda for each
 		'''
-		indexList = self.getOuterRowIndices()
-		for nm in self.m_outerRowNames:
-			locs = self.getAllLocationsOf(nm)
-			for idx in indexList:
-				loc = locs[idx]
-				theLambda(loc)
+		for loc in self.iterOuterPins():
+			theLambda(loc)
 
 
 	def doAllInnerPins(self, theLambda):
 		'''
 			Iterate over all inner row pins, doing theLambda for each
 		'''
-		indexList = self.getInnerRowIndices()
-		for nm in self.m_innerRowNames:
-			locs = self.getAllLocationsOf(nm)
-			for idx in indexList:
-				loc = locs[idx]
-				theLambda(loc)
+		for loc in self.iterInnerPins():
+			theLambda(loc)
 
 
 	def addInnerRow(self, name, x, y):
@@ -637,13 +2427,23 @@ class FritzingBreadBoard (FritzingPart):
 	def getOuterRowIndices(self):
 		'''
 			get all indices of the pins in outer rows (not including name locations).
-			Leave the  unused locations out.
-		'''
-		ret = []
-		for ii in range(1, self.m_numPinsPerLine + 1):
-			if ii % self.m_outerPinGroupsSize != 0:
-				ret.append(ii)
-		return ret
+			Leave the  unused locations out. Cached as long as the group size is unchanged.
+			In streaming mode a new (single use) iterator is returned on every call
+		'''
+		if self.m_streaming:
+			return (ii for ii in range(1, self.m_numPinsPerLine + 1) if ii % self.m_outerPinGroupsSize != 0)
+		key = (self.m_numPinsPerLine, self.m_outerPinGroupsSize)
+		if self.m_outerRowIndices is None or self.m_outerRowIndices[0] != key:
+			if self.m_locationListClass is ArrayLocationList:
+				indices = numpy.arange(1, self.m_numPinsPerLine + 1)
+				ret = indices[indices % self.m_outerPinGroupsSize != 0]
+			else:
+				ret = []
+				for ii in range(1, self.m_numPinsPerLine + 1):
+					if ii % self.m_outerPinGroupsSize != 0:
+						ret.append(ii)
+			self.m_outerRowIndices = (key, ret)
+		return self.m_outerRowIndices[1]
 
 
 	def getInnerRowIndices(self):
@@ -653,23 +2453,60 @@ class FritzingBreadBoard (FritzingPart):
 		return range(1, self.m_numPinsPerLine + 1)
 
 
+	def setStreamingMode(self, streaming=True):
+		'''
+			If streaming, Main.svg, Icon.svg and the fzp file are written while they are created:
+			every socket, text, connector and bus member is written and dropped right away
+			and no locations are held (StreamingLocationList), so the memory stays flat for any
+			board size. The files are the same as in the normal mode, but the fzp file is not
+			checked (see checkFzpIntegrity(), use ValidateParts.py on the fzpz file instead).
+			For flat memory the sink must not collect the files (e.g. no MemorySink)
+		'''
+		self.m_streaming = streaming
+		if streaming:
+			self.m_locationListClass = StreamingLocationList
+		elif self.m_locationListClass is StreamingLocationList:
+			self.m_locationListClass = LocationList
+		for name, theList in list(self.m_locationLists.items()):
+			self.addLocationList(name, theList.m_x, theList.m_y, theList.m_dx, theList.m_dy, theList.m_num)
+
+
+	@instrumentedStage
 	def writeMainSvg(self):
 		'''
 			Generate all svg objects amd write to file
 		'''
 		self.m_innerRowNames = sorted(self.m_innerRowNames)
 		self.m_outerRowNames = sorted(self.m_outerRowNames)
+		if self.isUpToDate('Main.svg', self.getGeometryInputs()):
+			return
 		self.initSvg()
+		self.writeGrowingXml(self.m_svgRoot, self.iterMainSvg(), 'Main.svg')
+
+
+	def iterMainSvg(self):
+		'''
+			the steps creating the main svg below m_svgRoot (see writeGrowingXml())
+		'''
+		if self.m_useSocketSymbol:
+			self.addSocketSymbolDefs(self.m_svgRoot)
 		self.m_mainNode = self.addGroup(self.m_svgRoot, name='breadboardbreadboard')
-		self.fillBackground('#d9d9d9')
+		yield self.m_mainNode, self.iterMainNode()
 
-		self.createRowNames(self.m_innerRowNames)
-		self.createRowNames(self.m_outerRowNames)
-		self.showSvgSockets()
-		self.showNumbering()
-		self.showElectrodes()
 
-		self.writePrettyXml(self.m_svgRoot, 'Main.svg')
+	def iterMainNode(self):
+		'''
+			the steps creating background, texts, sockets and electrodes
+		'''
+		self.fillBackground(self.m_backgroundColor)
+		texts = self.addGroup(self.m_mainNode, 'texts')
+		self.m_svgTextsGroup = texts
+		yield texts, chain(self.iterRowNames(texts, self.m_innerRowNames),
+			self.iterRowNames(texts, self.m_outerRowNames), self.iterNumbering(texts))
+		sockets = self.addGroup(self.m_mainNode, 'sockets')
+		yield sockets, self.iterSockets(sockets)
+		electrodes = self.addGroup(self.m_mainNode, 'electrodes')
+		yield electrodes, self.iterElectrodes(electrodes)
 
 
 	def showElectrodes(self):
@@ -677,26 +2514,34 @@ class FritzingBreadBoard (FritzingPart):
 			create the svg lines in red and blue
 		'''
 		group = self.addGroup(self.m_mainNode, 'electrodes')
-		thickness = 0.3 * self.s_scaleFactor
+		for _ in self.iterElectrodes(group):
+			pass
+
+
+	def iterElectrodes(self, group):
+		thickness = 0.3 * self.m_unit.m_scaleFactor
 		for elec in self.m_electrodeLines:
 			self.addRect(group, 0, elec[0], self.m_width, thickness, elec[1])
+			yield
 
 		
 	def showNumbering(self):
 		'''
 			Create the svg numbers beneath the inner rows
 		'''
-		locListName = self.m_innerRowNames[0]
+		for _ in self.iterNumbering(self.m_svgTextsGroup):
+			pass
+
+
+	def iterNumbering(self, texts):
+		locList = self.m_locationLists[self.m_innerRowNames[0]]
 		diff = self.m_numberingDiff
-		locs = self.getAllLocationsOf(locListName)
+		indices = range(diff, self.m_numPinsPerLine + 1, diff)
 
 		for y in self.m_numberingYValues:
-			idx = diff
-			while idx <= self.m_numPinsPerLine:
-					start = locs[idx]
-					x = start.m_x
-					self.addText(self.m_svgTextsGroup, str(idx), x, y + (self.m_distY / 2.0))
-					idx += diff
+			for idx, start in zip(indices, locList.iterLocations(indices)):
+				self.addText(texts, str(idx), start.m_x, y + (self.m_distY / 2.0))
+				yield
 
 
 	def createRowNames(self, rowNames):
@@ -707,38 +2552,67 @@ class FritzingBreadBoard (FritzingPart):
 		if texts is None:
 			texts = self.addGroup(self.m_mainNode, 'texts')
 			self.m_svgTextsGroup = texts
+		for _ in self.iterRowNames(texts, rowNames):
+			pass
+
+
+	def iterRowNames(self, texts, rowNames):
 		for name in rowNames:
-			locs = self.getAllLocationsOf(name)
-			for ii in [0, len(locs) - 1]:
-				start = locs[ii]
+			locList = self.m_locationLists[name]
+			for ii in [0, locList.m_num - 1]:
+				start = locList.getLocation(ii)
 				x = start.m_x
 				y = start.m_y + self.m_pinRadius * 1.2
 				self.addText(texts, name, x, y)
+				yield
 
 
 	def showSvgSockets(self):
 		'''
 			Create the svg for all sockets
 		'''
+		if self.m_useSocketSymbol:
+			self.addSocketSymbolDefs(self.m_svgRoot)
 		sockets = self.addGroup(self.m_mainNode, 'sockets')
-		self.doAllPins(lambda loc : self.showOneSvgSocket(sockets, loc))
+		for _ in self.iterSockets(sockets):
+			pass
+
+
+	def iterSockets(self, sockets):
+		for loc in self.iterAllPins():
+			self.showOneSvgSocket(sockets, loc)
+			yield
 
 
 	def createFzpConnectors(self):
 		'''
 			Create the xml description of all connectors in the fzp file
 		'''
-		conns = self.m_fzpConnectors
-		conns.set('ignoreTerminalPoints', 'true')
-		self.doAllPins(lambda loc : self.createFzpConnector(loc))
+		for _ in self.iterFzpConnectors():
+			pass
+
+
+	def iterFzpConnectors(self):
+		'''
+			one step per connector
+		'''
+		self.m_fzpConnectors.set('ignoreTerminalPoints', 'true')
+		for loc in self.iterAllPins():
+			self.createFzpConnector(loc)
+			yield
 
 
 	def createFzpConnector(self, location):
 		'''
 			Create the xml descriptor of one connector in the fzp file
 		'''
-		conn = ET.SubElement(self.m_fzpConnectors, 'connector')
 		connName = location.m_name
+		return self.addSharedElement(self.m_fzpConnectors, ('connector', connName, tuple(self.getFzpViews())),
+			lambda parent: self.createFzpConnectorNode(parent, connName))
+
+
+	def createFzpConnectorNode(self, parent, connName):
+		conn = ET.SubElement(parent, 'connector')
 		conn.set('id', connName)
 		conn.set('name', connName)
 		conn.set('type', 'female')
@@ -751,26 +2625,35 @@ class FritzingBreadBoard (FritzingPart):
 			p.set('svgId', connName + 'pin')
 		erc = ET.SubElement(conn, 'erc')
 		erc.set('ignore', 'always')
+		return conn
 
 
 	def createFzpBuses(self):
 		'''
 			create all xml buses in the fzp file
 		'''
+		for _ in self.iterFzpBuses():
+			pass
+
+
+	def iterFzpBuses(self):
+		'''
+			one step per bus, the long outer buses grow member by member
+		'''
 		# first the outer buses (blue and red lines)
-		indexes = self.getOuterRowIndices()
 		for outerName in self.m_outerRowNames:
-			locs = self.getAllLocationsOf(outerName)
-			pinIds = [locs[idx].m_name for idx in indexes]
-			id = 'o' + outerName
-			self.addBusNode(id, pinIds)
+			locations = self.m_locationLists[outerName].iterLocations(self.getOuterRowIndices())
+			bus = self.addBusNode('o' + outerName, [])
+			yield bus, self.iterBusMembers(bus, (loc.m_name for loc in locations))
 
 		# then the inner buses
 		for busGroup in self.m_busGroups:
 			id = 'i' + busGroup[0] + busGroup[-1]
 			for idx in range(self.m_numPinsPerLine):
-				pinIds = [rowName + str(idx+1) for rowName in busGroup]
-				self.addBusNode(id + str(idx+1), pinIds)
+				busId, pinIds = id + str(idx+1), tuple(rowName + str(idx+1) for rowName in busGroup)
+				self.addSharedElement(self.m_fzpBusesNode, ('bus', busId, pinIds),
+					lambda parent: self.addBusNode(busId, pinIds, parent))
+				yield
 
 	
 	def fzpInitAllViews(self, module):
@@ -783,23 +2666,29 @@ class FritzingBreadBoard (FritzingPart):
 			self.fzpInitOneView(views, viewName, self.getFilenameFor('Main.svg'), ['breadboardbreadboard'], 'breadboard')
 
 
+	@instrumentedStage
 	def createIconSvg(self, text=None):
 		'''
 			Create a simple svg file resembling the look of the board. If text is given, show it in the center
 		'''
+		if self.isUpToDate('Icon.svg', self.getGeometryInputs() + [self.m_electrodeLines, text]):
+			return
 		main = self.createSvgRootNode(32, 32)
 		symbols = self.addGroup(main, 'symbols')
+		self.writeGrowingXml(main, [[symbols, self.iterIconSymbols(symbols, text)]], 'Icon.svg')
+
+
+	def iterIconSymbols(self, symbols, text):
 		size = 32.0
 		scale = size / self.m_height
 
 		for electrode in self.m_electrodeLines:
 			self.addRect(symbols, 0, scale * electrode[0], size, 0.4, electrode[1])
+			yield
 		if text:
 			half = self.round(size * 0.5)
 			fontSize = 12
 			self.addText(symbols, text, half, half + fontSize * 0.35, fontSize=fontSize )
-						
-		self.writePrettyXml(main, 'Icon.svg')
 
 
 	#def writeOneIconSymbol(self, parent, loc, scale, size):
@@ -820,8 +2709,13 @@ class FritzingMicroProcessor(FritzingPart):
 	def __init__(self, mmOrInch, outFolder, fileNameRoot, width, height, pinDistX):
 		super().__init__(mmOrInch, outFolder, fileNameRoot, width, height, pinDistX, pinDistX)
 		self.m_pinRows = dict()
+		self.m_pinsByName = dict()		# name => MicroPin over all pin rows
+		self.m_connectivity = None		# cached by resolveConnectivity()
 		self.m_pinRadius = self.round(pinDistX * 0.15)	# recommended
 		self.m_backgroundColor = '#f0f0f0'
+		self.m_mainTextFill = None		# text color of the breadboard view (None: s_textFill), see setMainColors()
+		self.m_labelLayout = False		# True: pin labels placed by a LabelLayout, see setLabelLayout()
+		self.m_measureFont = False		# True: the label layout measures the installed font
 
 		# initialize for breadboard view:
 		self.initSvg()
@@ -830,56 +2724,170 @@ class FritzingMicroProcessor(FritzingPart):
 		self.m_graphics = self.addGroup(self.m_svgRoot, name='graphics')
 
 
+	def getGeometryInputs(self):
+		fontTable = FontMetrics.getTableHash(self.s_fontFamily, True) if self.m_labelLayout and self.m_measureFont else None
+		return super().getGeometryInputs() + [self.m_pinRadius, self.m_measureFont, fontTable]
+
+
+	def getPinInputs(self, *attributes):
+		'''
+			the given attributes of all pins, so each view only depends on the pin data it shows
+		'''
+		return [[name, [[getattr(pin, attr) for attr in attributes] for pin in list]] for name, list in self.m_pinRows.items()]
+
+
+	def getFzpInputs(self):
+		return super().getFzpInputs() + [self.getPinInputs('m_name', 'm_schemLoc', 'm_schemPos', 'm_pinType')]
+
+
 	def setMainColors(self, backgroundColor, textColor):
 		'''
 			set background and text color for the breadboard view
 		'''
 		self.m_backgroundColor = backgroundColor
+		self.m_mainTextFill = textColor
 		self.s_textFill = textColor
 
 
+	def setLabelLayout(self, useLayout=True, measureFont=False):
+		'''
+			If useLayout, the pin labels of the breadboard and pcb views are placed by a LabelLayout:
+			each label still prefers the line it would get by alternating, but takes the other line,
+			a third line or a smaller font where it would overlap another label or a pin.
+			The text widths come from the built in table, with measureFont from the installed font
+			file (the output then depends on the machine, see FontMetrics)
+		'''
+		self.m_labelLayout = useLayout
+		self.m_measureFont = measureFont
+
+
+	def createLabelLayout(self, pinRadius):
+		'''
+			return a LabelLayout knowing all pins as obstacles (None without label layout)
+		'''
+		if not self.m_labelLayout:
+			return None
+		layout = LabelLayout(2 * max(self.m_distX, self.m_distY), self.s_fontFamily, self.m_measureFont)
+		for list in self.m_pinRows.values():
+			for microPin in list:
+				if microPin.m_name is not None:
+					layout.addObstacle([microPin.m_x - pinRadius, microPin.m_y - pinRadius, microPin.m_x + pinRadius, microPin.m_y + pinRadius])
+		return layout
+
+
+	def placeLabel(self, layout, microPin, yText1, yText2, shift, fontSize):
+		'''
+			return [y, fontSize] of the label of microPin, preferring yText2 if shift, else yText1.
+			The layout may also use a third line beyond yText2
+		'''
+		candidates = [yText2, yText1] if shift else [yText1, yText2]
+		if layout is None:
+			return [candidates[0], fontSize]
+		candidates.append(yText2 + (yText2 - yText1))
+		return layout.place(microPin.m_name, microPin.m_x, candidates, fontSize)
+
+
 	def addPinRow(self, name, x,  y, distX, distY, microPins, pinType='male'):
 		'''
 			for an example for micro pins see the CreateArduinoMicro.py
 		'''
-		list = []
-		self.m_pinRows[name] = list
+		list = self.startPinRow(name, microPins)
 		pX = x
 		pY = y
+		pinsByName = self.m_pinsByName
 		for pin in microPins:
-			name = pin.m_name
-			if name:
-				oldPin = self.findPinNamed(name)
-				if oldPin is not None:
-					raise Exception('duplicate name: ' + name)
+			if pin.m_name:
+				pinsByName[pin.m_name] = pin
 			pin.m_x = self.round(pX)
 			pin.m_y = self.round(pY)
 			pX += distX
 			pY += distY
 			pin.m_pinType = pinType
 			list.append(pin)
-		
+
+
+	def startPinRow(self, name, microPins):
+		'''
+			return the new (empty) pin list of the row name for microPins, replacing an older row of
+			this name. The pin names are checked first, so a duplicate name changes nothing
+		'''
+		replaced = set(pin.m_name for pin in self.m_pinRows.get(name, []) if pin.m_name)
+		seen = set()
+		for pin in microPins:
+			pinName = pin.m_name
+			if pinName:
+				if pinName in seen or (pinName in self.m_pinsByName and pinName not in replaced):
+					raise Exception('duplicate name: ' + pinName)
+				seen.add(pinName)
+
+		list = []
+		self.m_connectivity = None
+		if name in self.m_pinRows:
+			# the row is replaced, forget its pins
+			for pin in self.m_pinRows[name]:
+				if pin.m_name:
+					del self.m_pinsByName[pin.m_name]
+		self.m_pinRows[name] = list
+		return list
+
+
+	def addPinArray(self, name, x, y, pitch, microPins, angle=0, pinType='male'):
+		'''
+			Add a straight row of pins from (x, y) in steps of pitch in the direction angle (degrees,
+			0: to the right, 90: downwards), e.g. a vertical pin column or one side of a castellated
+			module (the 4 sides: angles 0, 90, 180, 270)
+		'''
+		self.addPinGrid(name, x, y, len(microPins), pitch, 0, microPins, angle, pinType)
+
+
+	def addPinGrid(self, name, x, y, numColumns, pitchX, pitchY, microPins, angle=0, pinType='male', transform=None):
+		'''
+			Add the pins as a matrix with numColumns columns, filled row by row (e.g. a 2x40 header:
+			numColumns=2, 80 pins), rotated by angle degrees around the first pin at (x, y).
+			A given AffineTransform is applied instead of angle and (x, y). Pins without name leave gaps.
+			The coordinates of all pins are computed in one batch (see AffineTransform)
+		'''
+		if numColumns < 1:
+			raise Exception('a pin grid needs at least one column: ' + name)
+		xs, ys = AffineTransform.getGridPoints(len(microPins), numColumns, pitchX, pitchY)
+		if transform is None:
+			transform = AffineTransform.rotation(angle, x, y)
+		xs, ys = transform.apply(xs, ys)
+
+		list = self.startPinRow(name, microPins)
+		pinsByName = self.m_pinsByName
+		for pin, pX, pY in zip(microPins, xs, ys):
+			if pin.m_name:
+				pinsByName[pin.m_name] = pin
+			pin.m_x = pX
+			pin.m_y = pY
+			pin.m_pinType = pinType
+			list.append(pin)
+
 
 	def findPinNamed(self, name):
 		'''
 			Find the pin with the given name (must be unique)
 		'''
-		for _, list in self.m_pinRows.items():
-			for pin in list:
-				if pin.m_name == name:
-					return pin
-		return None
+		return self.m_pinsByName.get(name)
 
 
+	@instrumentedStage
 	def writeMainSvg(self):
 		'''
 			Create the pins and texts for the breadboard view
 			Currently no background image is supported
 			output the svg file
 		'''
+		textFill = self.m_mainTextFill or self.s_textFill
+		inputs = self.getGeometryInputs() + [self.m_backgroundColor, textFill, self.getPinInputs('m_name', 'm_x', 'm_y'),
+			ET.tostring(self.m_svgRoot), self.m_labelLayout]
+		if self.isUpToDate('Main.svg', inputs):
+			return
 		self.fillBackground(self.m_backgroundColor)
 
-		fontSize = self.s_usedFontSize * 0.5
+		fontSize = self.m_unit.m_usedFontSize * 0.5
+		layout = self.createLabelLayout(self.m_pinRadius)
 
 		for _, list in self.m_pinRows.items():
 			shift = False
@@ -893,8 +2901,8 @@ class FritzingMicroProcessor(FritzingPart):
 			for microPin in list:
 				if microPin.m_name is not None:
 					self.showOneMicroSocket(self.m_mainNode, microPin)
-					yText = yText2 if shift else yText1
-					self.addText(self.m_texts, microPin.m_name, microPin.m_x, yText, fontSize=fontSize)
+					yText, size = self.placeLabel(layout, microPin, yText1, yText2, shift, fontSize)
+					self.addText(self.m_texts, microPin.m_name, microPin.m_x, yText, fill=textFill, fontSize=size)
 					shift = not shift
 
 
@@ -912,47 +2920,71 @@ class FritzingMicroProcessor(FritzingPart):
 
 
 
-	def getSchematicOtherReferences(self):
+	def addConnectorBus(self, connectors):
 		'''
-			return a dict with e.g. RESET => [RESET_2, RESET_3], GND => [GND_2]
-			also add the found buses
+			Store one bus (list of pin names) for later usage in the fzp file
+		'''
+		super().addConnectorBus(connectors)
+		self.m_connectivity = None
+
+
+	def resolveConnectivity(self):
 		'''
-		ret = dict()
+			Resolve the other references (e.g. oGND) and the buses given by addConnectorBus()
+			once, and return [references, buses] (see getSchematicOtherReferences() and getBusPartition()).
+			The result is cached until pins or buses are added
+		'''
+		if self.m_connectivity is not None:
+			return self.m_connectivity
+		references = dict()
 		for _,list in self.m_pinRows.items():
 			for microPin in list:
-				loc = microPin.m_schemLoc
-				if loc == 'o':
+				if microPin.m_schemLoc == 'o':
 					# a reference
 					pos = microPin.m_schemPos
-					if not pos in ret.keys():
+					if not pos in references:
 						# a new other referenced pin
 						other = self.findPinNamed(pos)
+						if other is None:
+							raise Exception('unknown referenced pin: ' + pos)
 						if other.m_schemLoc == 'o':
 							raise Exception('illegal double other reference: ' + pos)
-						ret[pos] = []
-					ret[pos].append(microPin.m_name)
-		# now add the according buses (if not yet present):
-		for name, list in ret.items():
-			foundBus = None
-			for bus in self.m_fzpBuses:
-				if name in bus:
-					foundBus = bus
-					break
-			if foundBus is None:
-				foundBus = [name]
-				self.m_fzpBuses.append(foundBus)
-			for listItem in list:
-				if not listItem in foundBus:
-					foundBus.append(listItem)
-		return ret
+						references[pos] = []
+					references[pos].append(microPin.m_name)
+
+		resolver = ConnectivityResolver()
+		for bus in self.m_fzpBuses:
+			resolver.connect(bus)
+		for name, list in references.items():
+			resolver.connect([name] + list)
+		self.m_connectivity = [references, resolver.getBuses()]
+		return self.m_connectivity
+
+
+	def getSchematicOtherReferences(self):
+		'''
+			return a dict with e.g. RESET => [RESET_2, RESET_3], GND => [GND_2]
+		'''
+		return self.resolveConnectivity()[0]
+
+
+	def getBusPartition(self):
+		'''
+			return the buses (lists of pin names) built from addConnectorBus() and the other references
+		'''
+		return self.resolveConnectivity()[1]
 
 
+	@instrumentedStage
 	def writeSchematicSvg(self, numWidth, numHeight, outer):
 		'''
 			Create the schematic svg objects and output the file. Handle the intricate
 			case of double pins (like GND and RESET)
 		'''
 		self.s_textFill = '#000000'
+		inputs = self.getGeometryInputs() + [self.getPinInputs('m_name', 'm_schemLoc', 'm_schemPos'), numWidth, numHeight, outer]
+		if self.isUpToDate('Schematic.svg', inputs):
+			return
 		outerX = outer * self.m_distX
 		outerY = outer * self.m_distY
 		width = numWidth * self.m_distX + 2*outerX
@@ -962,7 +2994,7 @@ class FritzingMicroProcessor(FritzingPart):
 		innerRect = self.addRect(schematic, outerX, outerY, width-2*outerX, height-2*outerY, '#FFFFFF')
 		innerRect.set('class', 'interior rect')
 		innerRect.set('stroke', '#000000' )
-		lineStrokeWidth = 0.1 * self.s_scaleFactor
+		lineStrokeWidth = 0.1 * self.m_unit.m_scaleFactor
 		innerRect.set('stroke-width', str(2 * lineStrokeWidth))
 		fontSize = self.m_distY * 0.5
 		rectRadius = self.m_distX * 0.2
@@ -1033,21 +3065,25 @@ class FritzingMicroProcessor(FritzingPart):
 		rect.set('stroke', 'none')
 
 
+	@instrumentedStage
 	def writePcbSvg(self):
 		'''
 			create and output the contents of the pcb file
 		'''
+		if self.isUpToDate('Pcb.svg', self.getGeometryInputs() + [self.getPinInputs('m_name', 'm_x', 'm_y'), self.m_labelLayout]):
+			return
 		svg = self.createSvgRootNode(self.m_width, self.m_height)
 		silkscreen = self.addGroup(svg, 'silkscreen')
 		rect = self.addRect(silkscreen, 0, 0, self.m_width, self.m_height, 'none')
 		rect.set('stroke', '#000000')
-		rect.set('stroke-width', str(self.round(self.s_scaleFactor * 0.1)))
+		rect.set('stroke-width', str(self.round(self.m_unit.m_scaleFactor * 0.1)))
 		copper0 = self.addGroup(svg, 'copper0')
 				
 		copper0Color = '#9a916c'
-		rad = 0.619 * self.s_scaleFactor
-		strokeWidth = 0.3379 * self.s_scaleFactor
-		fontSize = self.s_usedFontSize * 0.5
+		rad = 0.619 * self.m_unit.m_scaleFactor
+		strokeWidth = 0.3379 * self.m_unit.m_scaleFactor
+		fontSize = self.m_unit.m_usedFontSize * 0.5
+		layout = self.createLabelLayout(rad + strokeWidth * 0.5)
 		shift = False
 
 		for _,list in self.m_pinRows.items():
@@ -1064,14 +3100,135 @@ class FritzingMicroProcessor(FritzingPart):
 					circle = self.addCircle(copper0, microPin.m_x, microPin.m_y, rad, strokeWidth, 'none', copper0Color)
 					circle.set('id', microPin.m_name + 'pad')
 					circle.set('connectorname', microPin.m_name)
-					yText = yText2 if shift else yText1
-					self.addText(silkscreen, microPin.m_name, microPin.m_x, yText, fontSize=fontSize)
+					yText, size = self.placeLabel(layout, microPin, yText1, yText2, shift, fontSize)
+					self.addText(silkscreen, microPin.m_name, microPin.m_x, yText, fontSize=size)
 					shift = not shift
 
 		self.writePrettyXml(svg, 'Pcb.svg')
 
 
 
+	def buildAll(self, schematicSize, fzpArgs, pool='thread', maxWorkers=None):
+		'''
+			Write the Main, Schematic, Pcb and Icon svg files at the same time, then the fzp file
+			(checked against the ids of the svg files before it is written) and the fzpz file. Call it when pins, buses, texts and the icon (createIconRootNode()) are complete.
+			schematicSize:	[numWidth, numHeight, outer], see writeSchematicSvg()
+			fzpArgs:		[moduleId, fritzingVersion, metaDict, tags, properties], see createFzp()
+			pool:			'thread' or 'process'. Processes (each working on a copy of the part) really
+							run in parallel, but need a FileSink or a MemorySink
+		'''
+		if pool not in ['thread', 'process']:
+			raise Exception('unknown pool: ' + str(pool))
+		if pool == 'process' and not isinstance(self.m_outputSink, (FileSink, MemorySink)):
+			raise Exception('a process pool needs a FileSink or a MemorySink')
+
+		# prepare all that the views share, before they start
+		self.resolveConnectivity()
+		self.getLibraryFingerprint()
+		if self.m_incremental:
+			self.getManifest()
+		if self.m_mainTextFill is None:
+			self.m_mainTextFill = self.s_textFill
+		if self.m_iconRoot is None:
+			self.createIconRootNode()
+		self.s_textFill = FritzingPart.s_textFill		# as set by writeSchematicSvg() for pcb and icon
+		jobs = [
+			['Main.svg', []],
+			['Schematic.svg', list(schematicSize)],
+			['Pcb.svg', []],
+			['Icon.svg', []]
+		]
+
+		instrumentation = self.m_instrumentation
+		self.m_holdManifest = True
+		try:
+			if pool == 'process':
+				with ProcessPoolExecutor(max_workers=maxWorkers) as executor:
+					futures = [executor.submit(self.renderView, postfix, args, True) for postfix, args in jobs]
+					results = [future.result() for future in futures]
+				for result in results:
+					self.adoptViewResult(result)
+			else:
+				if instrumentation is not None:
+					instrumentation.m_concurrent = True
+				try:
+					with (instrumentation.stage('buildAll') if instrumentation is not None else nullcontext()):
+						with ThreadPoolExecutor(max_workers=maxWorkers or len(jobs)) as executor:
+							futures = [executor.submit(self.renderView, postfix, args) for postfix, args in jobs]
+							for future in futures:
+								future.result()
+				finally:
+					if instrumentation is not None:
+						instrumentation.m_concurrent = False
+			# now all svg ids are known: the fzp file is checked before it is written
+			self.renderView('.fzp', list(fzpArgs))
+		finally:
+			self.m_holdManifest = False
+		if self.m_incremental:
+			self.saveManifest()
+		self.writeFzpz()
+
+
+	def renderView(self, postfix, args, inOtherProcess=False):
+		'''
+			Write the file of postfix with args (runs in a pool thread or process, see buildAll()).
+			Return what the part learned meanwhile, for a part in another process see adoptViewResult()
+		'''
+		if inOtherProcess and self.m_instrumentation is not None:
+			# measure only this view, the report is merged by the caller
+			self.setInstrumentation(BuildInstrumentation(self.m_instrumentation.m_traceMemory, self.m_instrumentation.m_profileFolder))
+		writers = {
+			'Main.svg': self.writeMainSvg,
+			'Schematic.svg': self.writeSchematicSvg,
+			'Pcb.svg': self.writePcbSvg,
+			'Icon.svg': self.writeOutIconFile,
+			'.fzp': self.createFzp
+		}
+		numWritten = len(self.m_writtenOutputs)
+		writers[postfix](*args)
+		filename = self.getFilenameFor(postfix)
+		ret = {
+			'postfix': postfix,
+			'written': postfix in self.m_writtenOutputs[numWritten:],
+			'svgIds': self.m_svgIds.get(filename),
+			'hash': None,
+			'data': None,
+			'fzpRoot': None,
+			'report': None
+		}
+		if inOtherProcess:
+			if ret['written']:
+				ret['hash'] = self.getManifest().get(postfix) if self.m_incremental else None
+				ret['data'] = self.m_outputSink.read(filename) if isinstance(self.m_outputSink, MemorySink) else None
+				ret['fzpRoot'] = self.m_fzpRoot if postfix == '.fzp' else None
+			if self.m_instrumentation is not None:
+				ret['report'] = self.m_instrumentation.getReport()
+		return ret
+
+
+	def adoptViewResult(self, result):
+		'''
+			take over the result of renderView() in another process
+		'''
+		postfix = result['postfix']
+		filename = self.getFilenameFor(postfix)
+		if result['written']:
+			self.m_outputsChanged = True
+			self.m_writtenOutputs.append(postfix)
+			if result['hash'] is not None:
+				self.getManifest()[postfix] = result['hash']
+			if result['data'] is not None:
+				self.m_outputSink.m_files[filename] = result['data']
+			if result['fzpRoot'] is not None:
+				self.m_fzpRoot = result['fzpRoot']
+				self.m_fzpConnectors = self.m_fzpRoot.find('connectors')
+				self.m_fzpBusesNode = self.m_fzpRoot.find('buses')
+		if result['svgIds'] is not None:
+			self.m_svgIds[filename] = result['svgIds']
+		if result['report'] is not None:
+			self.m_instrumentation.mergeReport(result['report'])
+
+
 	def fzpInitAllViews(self, module):
 		'''
 			create the views description at the beginning of the fzp file
@@ -1097,11 +3254,13 @@ class FritzingMicroProcessor(FritzingPart):
 					continue
 				
 				loc = microPin.m_schemLoc
-				if loc != 'o':					
-					if mainIdRoot in schematicOtherReferences.keys():
-						others = schematicOtherReferences[mainIdRoot]
-						for otherName in others:
-							self.createOneFzpConnector(connectors, otherName, mainIdRoot, microPin.m_pinType)
+				if loc == 'o':
+					# created together with the referenced pin (see below), not twice
+					continue
+				if mainIdRoot in schematicOtherReferences.keys():
+					others = schematicOtherReferences[mainIdRoot]
+					for otherName in others:
+						self.createOneFzpConnector(connectors, otherName, mainIdRoot, microPin.m_pinType)
 				self.createOneFzpConnector(connectors, mainIdRoot, mainIdRoot, microPin.m_pinType)
 							
 
@@ -1144,6 +3303,6 @@ class FritzingMicroProcessor(FritzingPart):
 			Create the xml bus descriptions in the fzp file
 		'''
 		idx = 1
-		for bus in self.m_fzpBuses:
+		for bus in self.getBusPartition():
 			self.addBusNode('bus' + str(idx), ['connector' + nm for nm in bus])
 			idx += 1
\ No newline at end of file
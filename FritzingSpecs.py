@@ -0,0 +1,332 @@
+'''
+	Declarative part descriptions (json or toml) for the classes in fritzing.FritzingParts,
+	and a batch generator that builds many of them in parallel on a process pool.
+
+	A microprocessor spec looks like (see specs/ArduinoMicro_00.json):
+		type:			"microprocessor"
+		fileNameRoot, unit ("mm" or "in"), width, height, pinDist
+		mainColors:		[background, foreground] (optional)
+		labelLayout:	true to place the pin labels without overlaps (optional, for dense pin rows)
+		measureFont:	true to measure the labels with the installed font (optional, needs fontTools)
+		texts, rects:	lists of {parent: "texts"|"graphics", ...} (optional)
+		pinRows:		list of {name, x, y, distX, distY, pinType, pins: [[name, position], ...]}
+						or pin arrays {name, x, y, pitch, angle, ...}, see addPinArray()
+						or pin grids {name, x, y, columns, pitchX, pitchY, angle, ...}, see addPinGrid()
+		buses:			lists of pin names to be connected (optional)
+		schematic:		{width, height, outer} in pin steps
+		icon:			{texts: [...]} (optional)
+		fzp:			{moduleId, fritzingVersion, meta, tags, properties}
+		compactSvg:		true for smaller svg files (optional, see FritzingPart.setCompactSvgMode())
+
+	A breadboard spec looks like (see specs/BroadBreadBoard.json):
+		type:			"breadboard"
+		fileNameRoot, unit, width, height, numPins, pinDist, left, top
+		rows:			list of {outer: "ZY"} or {inner: "JIHGF", numbersBefore, numbersAfter}
+		busGroups:		list of lists of inner row names
+		backgroundColor:	color of the board (optional, default #d9d9d9)
+		iconText:		text shown in the icon (optional)
+		arrayGeometry:	true to hold the sockets in numpy arrays (optional, for very big boards)
+		socketSymbol:	true to define the socket artwork once and <use> it (optional, smaller files)
+		streaming:		true to write the files while creating them (optional, flat memory for huge boards)
+		compactSvg, fzp:	as above
+'''
+
+
+import os
+import json
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from fritzing.FritzingParts import FritzingMicroProcessor, FritzingBreadBoard, MicroPin, BuildInstrumentation, WriteBehindSink
+
+
+class PartSpec:
+	'''
+		One part description, able to build the part with all its files
+	'''
+
+	def __init__(self, data, sourceName='<spec>'):
+		self.m_data = data
+		self.m_sourceName = sourceName
+
+
+	@classmethod
+	def load(cls, path):
+		'''
+			read a spec from a .json or .toml file
+		'''
+		if path.endswith('.toml'):
+			try:
+				import tomllib
+			except ImportError:
+				raise Exception('toml specs need python 3.11 or newer: ' + path)
+			with open(path, 'rb') as specFile:
+				data = tomllib.load(specFile)
+		else:
+			with open(path, 'r', encoding='utf-8') as specFile:
+				data = json.load(specFile)
+		return cls(data, path)
+
+
+	def get(self, key, default=None):
+		return self.m_data.get(key, default)
+
+
+	def need(self, key, data=None):
+		'''
+			return a mandatory value of the spec (or of the given sub dict)
+		'''
+		data = self.m_data if data is None else data
+		if key not in data:
+			raise Exception(self.m_sourceName + ': missing key: ' + key)
+		return data[key]
+
+
+	def getFileNameRoot(self):
+		return self.need('fileNameRoot')
+
+
+	def build(self, outRoot, part=None, incremental=False, zipOptions=None, instrumentation=None, writeBehind=False, sharedCache=None):
+		'''
+			Create the part with all its files in outRoot/<fileNameRoot>.
+			If part is given, it is used instead of a newly created one (e.g. with another output sink).
+			If incremental, only files with changed inputs are generated again.
+			zipOptions: [compression, reproducible] for the fzpz file (see FritzingPart.setFzpzOptions())
+			instrumentation: a BuildInstrumentation measuring the stages
+			writeBehind: write the files on a background thread (see WriteBehindSink)
+			sharedCache: a SharedCache of the part family, see fritzing.FritzingFamily
+			Return the part
+		'''
+		theType = self.need('type')
+		if theType == 'microprocessor':
+			if part is None:
+				part = self.createMicroProcessor(outRoot)
+			buildFunc = self.buildMicroProcessor
+		elif theType == 'breadboard':
+			if part is None:
+				part = self.createBreadBoard(outRoot)
+			buildFunc = self.buildBreadBoard
+		else:
+			raise Exception(self.m_sourceName + ': unknown part type: ' + str(theType))
+		sink = None
+		if writeBehind:
+			sink = WriteBehindSink(self.getOutFolder(outRoot))
+			part.setOutputSink(sink)
+		part.setIncrementalBuild(incremental)
+		if zipOptions is not None:
+			part.setFzpzOptions(*zipOptions)
+		if instrumentation is not None:
+			part.setInstrumentation(instrumentation)
+		if sharedCache is not None:
+			part.setSharedCache(sharedCache)
+		try:
+			return buildFunc(outRoot, part)
+		finally:
+			if sink is not None:
+				sink.close()		# ends its thread
+
+
+	def createPart(self, outRoot=None):
+		'''
+			return the part with all pins, rows, buses, texts and the icon of the spec, nothing written yet
+		'''
+		theType = self.need('type')
+		if theType == 'microprocessor':
+			return self.fillMicroProcessor(self.createMicroProcessor(outRoot))
+		if theType == 'breadboard':
+			return self.fillBreadBoard(self.createBreadBoard(outRoot))
+		raise Exception(self.m_sourceName + ': unknown part type: ' + str(theType))
+
+
+	def getOutFolder(self, outRoot):
+		if outRoot is None:
+			return None
+		if not os.path.isdir(outRoot):
+			os.makedirs(outRoot)
+		return outRoot + '/' + self.getFileNameRoot()
+
+
+	def createMicroProcessor(self, outRoot):
+		miPro = FritzingMicroProcessor(self.need('unit'), self.getOutFolder(outRoot), self.getFileNameRoot(),
+			self.need('width'), self.need('height'), self.need('pinDist'))
+		if self.get('compactSvg'):
+			miPro.setCompactSvgMode()
+		if self.get('labelLayout'):
+			miPro.setLabelLayout(measureFont=bool(self.get('measureFont')))
+		return miPro
+
+
+	def fillMicroProcessor(self, miPro):
+		parents = {'texts': miPro.m_texts, 'graphics': miPro.m_graphics}
+
+		if self.get('mainColors'):
+			miPro.setMainColors(*self.get('mainColors'))
+		for rect in self.get('rects', []):
+			miPro.addRect(parents[rect.get('parent', 'graphics')], self.need('x', rect), self.need('y', rect),
+				self.need('w', rect), self.need('h', rect), self.need('color', rect))
+		for text in self.get('texts', []):
+			self.addSpecText(miPro, parents[text.get('parent', 'texts')], text)
+
+		for row in self.need('pinRows'):
+			pins = [MicroPin(pin[0], pin[1]) for pin in self.need('pins', row)]
+			name, x, y, pinType = self.need('name', row), self.need('x', row), self.need('y', row), row.get('pinType', 'male')
+			if 'columns' in row:
+				miPro.addPinGrid(name, x, y, self.need('columns', row), self.need('pitchX', row), self.need('pitchY', row),
+					pins, row.get('angle', 0), pinType)
+			elif 'pitch' in row:
+				miPro.addPinArray(name, x, y, self.need('pitch', row), pins, row.get('angle', 0), pinType)
+			else:
+				miPro.addPinRow(name, x, y, self.need('distX', row), row.get('distY', 0), pins, pinType)
+		for bus in self.get('buses', []):
+			miPro.addConnectorBus(list(bus))
+
+		iconRoot = miPro.createIconRootNode()
+		for text in self.get('icon', {}).get('texts', []):
+			self.addSpecText(miPro, iconRoot, text)
+		return miPro
+
+
+	def buildMicroProcessor(self, outRoot, miPro=None):
+		if miPro is None:
+			miPro = self.createMicroProcessor(outRoot)
+		self.fillMicroProcessor(miPro)
+
+		miPro.writeMainSvg()
+		schematic = self.need('schematic')
+		miPro.writeSchematicSvg(self.need('width', schematic), self.need('height', schematic), self.need('outer', schematic))
+		miPro.writePcbSvg()
+		miPro.writeOutIconFile()
+
+		self.createFzp(miPro)
+		miPro.writeFzpz()
+		return miPro
+
+
+	def createBreadBoard(self, outRoot):
+		board = FritzingBreadBoard(self.need('unit'), self.getOutFolder(outRoot), self.getFileNameRoot(),
+			self.need('width'), self.need('height'), self.need('numPins'), self.need('pinDist'))
+		if self.get('arrayGeometry'):
+			board.useArrayGeometry()
+		if self.get('socketSymbol'):
+			board.setSocketSymbolMode()
+		if self.get('streaming'):
+			board.setStreamingMode()
+		if self.get('compactSvg'):
+			board.setCompactSvgMode()
+		if self.get('backgroundColor'):
+			board.m_backgroundColor = self.get('backgroundColor')
+		return board
+
+
+	def fillBreadBoard(self, board):
+		left = self.need('left')
+		y = self.need('top')
+		for row in self.need('rows'):
+			if 'outer' in row:
+				y = board.add2OuterRows(row['outer'], left, y)
+			else:
+				y = board.addInnerRows(self.need('inner', row), left, y, row.get('numbersBefore', True), row.get('numbersAfter', True))
+		board.m_busGroups = [list(group) for group in self.get('busGroups', [])]
+		return board
+
+
+	def buildBreadBoard(self, outRoot, board=None):
+		if board is None:
+			board = self.createBreadBoard(outRoot)
+		self.fillBreadBoard(board)
+
+		board.writeMainSvg()
+		board.createIconSvg(self.get('iconText'))
+		self.createFzp(board)
+		board.writeFzpz()
+		return board
+
+
+	def addSpecText(self, part, parent, text):
+		part.addText(parent, self.need('text', text), self.need('x', text), self.need('y', text),
+			fill=text.get('fill'), fontSize=text.get('fontSize', 0), anchor=text.get('anchor', 'middle'))
+
+
+	def createFzp(self, part):
+		fzp = self.need('fzp')
+		moduleId = fzp.get('moduleId', self.getFileNameRoot() + 'ModuleID')
+		part.createFzp(moduleId, self.need('fritzingVersion', fzp), self.need('meta', fzp),
+			fzp.get('tags', []), fzp.get('properties', []))
+
+
+########################################################################
+########################################################################
+
+
+def findSpecFiles(paths):
+	'''
+		return all spec files given directly or found (recursively) in the given folders
+		(without the manifests and reports written next to generated parts)
+	'''
+	ret = []
+	for path in paths:
+		if os.path.isdir(path):
+			for folder, _, files in os.walk(path):
+				for name in sorted(files):
+					if name.endswith('.manifest.json') or name.endswith('.report.json'):
+						continue
+					if name.endswith('.json') or name.endswith('.toml'):
+						ret.append(os.path.join(folder, name))
+		else:
+			ret.append(path)
+	return ret
+
+
+def buildSpecFile(path, outRoot, incremental=False, zipOptions=None, instrument=None, writeBehind=False):
+	'''
+		build one part from a spec file and report success or failure as a dict
+		(runs inside of a worker process).
+		instrument: None, 'report' (write <name>.report.json next to the part files)
+		or 'profile' (additionally dump a cProfile file per stage)
+		writeBehind: write the files on a background thread, see PartSpec.build()
+	'''
+	start = time.perf_counter()
+	result = {'spec': path, 'part': None, 'ok': False, 'error': None, 'changed': None}
+	try:
+		spec = PartSpec.load(path)
+		result['part'] = spec.getFileNameRoot()
+		instrumentation = None
+		if instrument is not None:
+			partFolder = spec.getOutFolder(outRoot)
+			if not os.path.isdir(partFolder):
+				os.mkdir(partFolder)
+			instrumentation = BuildInstrumentation(True, partFolder if instrument == 'profile' else None)
+		part = spec.build(outRoot, incremental=incremental, zipOptions=zipOptions, instrumentation=instrumentation, writeBehind=writeBehind)
+		if instrumentation is not None:
+			result['report'] = part.getFullPathFor('.report.json')
+			instrumentation.writeReport(result['report'])
+		result['changed'] = part.m_outputsChanged
+		result['ok'] = True
+	except Exception as exc:
+		result['error'] = str(exc) or type(exc).__name__
+		result['traceback'] = traceback.format_exc()
+	result['seconds'] = round(time.perf_counter() - start, 3)
+	return result
+
+
+def generateParts(paths, outRoot, numProcesses=None, reportFunc=None, incremental=False, zipOptions=None, instrument=None, writeBehind=False):
+	'''
+		Build all parts of the given spec files (or folders) on a process pool
+		using numProcesses processes (default: all cores).
+		If incremental, unchanged files are not generated again.
+		zipOptions: [compression, reproducible] for the fzpz files.
+		instrument: None, 'report' or 'profile', see buildSpecFile().
+		writeBehind: rendering and writing of each part overlap, see PartSpec.build().
+		reportFunc(result) is called for each finished part.
+		Return the list of result dicts in the order of the spec files
+	'''
+	specFiles = findSpecFiles(paths)
+	results = []
+	with ProcessPoolExecutor(max_workers=numProcesses) as pool:
+		futures = [pool.submit(buildSpecFile, path, outRoot, incremental, zipOptions, instrument, writeBehind) for path in specFiles]
+		for future in futures:
+			result = future.result()
+			if reportFunc is not None:
+				reportFunc(result)
+			results.append(result)
+	return results
@@ -0,0 +1,149 @@
+'''
+	Checks a library of fzpz files in parallel, one file per task of a process pool:
+	- every view image of the fzp file is a member of the archive
+	- every svgId and terminalId of a connector exists in the svg file of its view
+	- every bus member is a connector (and no connector id is used twice)
+	- width, height and viewBox of every svg file use consistent units, as written by
+	  FritzingPart.createSvgRootNode(): width="48mm" height="18mm" viewBox="0 0 48 18"
+	All xml is read streaming (see fritzing.FritzingImporter), the report is a json compatible dict
+'''
+
+
+import os
+import re
+import time
+import traceback
+from zipfile import ZipFile, BadZipFile
+from concurrent.futures import ProcessPoolExecutor
+from fritzing.FritzingImporter import iterXml, readFzp, parseLength, findFzpzFiles, findSvgMember
+
+
+def checkSvgRoot(elem, image):
+	'''
+		return the problems of the size attributes of a svg root node
+	'''
+	try:
+		unit, width = parseLength(elem.get('width'))
+		heightUnit, height = parseLength(elem.get('height'))
+	except Exception as exc:
+		return [image + ': ' + str(exc)]
+	if heightUnit != unit:
+		return [image + ': width and height use different units (' + unit + ', ' + heightUnit + ')']
+	viewBox = re.split(r'[\s,]+', (elem.get('viewBox') or '').strip())
+	try:
+		numbers = [float(value) for value in viewBox]
+	except ValueError:
+		numbers = []
+	if len(numbers) != 4:
+		return [image + ': missing or invalid viewBox: ' + str(elem.get('viewBox'))]
+	if numbers[0] != 0 or numbers[1] != 0 or abs(numbers[2] - width) > 1e-6 or abs(numbers[3] - height) > 1e-6:
+		return [image + ': viewBox ' + elem.get('viewBox') + ' does not match ' + elem.get('width') + ' x ' + elem.get('height')]
+	return []
+
+
+def readSvgIds(stream, image, problems):
+	'''
+		return the set of element ids of a svg stream, add the problems of its root node to problems
+	'''
+	ids = set()
+	for event, elem, path in iterXml(stream):
+		if event == 'start':
+			if not path:
+				problems.extend(checkSvgRoot(elem, image))
+			continue
+		elemId = elem.get('id')
+		if elemId is not None:
+			ids.add(elemId)
+	return ids
+
+
+def validateFzpz(path, maxProblems=50):
+	'''
+		check one fzpz file (runs inside of a worker process) and return the result as a dict
+		{fzpz, ok, problems, seconds}, listing at most maxProblems problems
+	'''
+	start = time.perf_counter()
+	problems = []
+	result = {'fzpz': path}
+	try:
+		with ZipFile(path) as zipFile:
+			names = zipFile.namelist()
+			fzpNames = sorted(name for name in names if name.endswith('.fzp'))
+			if len(fzpNames) != 1:
+				raise Exception('one fzp file expected, found ' + str(len(fzpNames)))
+			with zipFile.open(fzpNames[0]) as stream:
+				fzp = readFzp(stream)
+
+			# the svg ids per view, each svg file read once
+			svgIds = dict()			# member name => ids
+			viewIds = dict()		# view tag => ids (None: svg file missing)
+			for viewTag, (image, _) in fzp['views'].items():
+				if not image:
+					problems.append(viewTag + ': no image')
+					continue
+				member = findSvgMember(names, image)
+				if member is None:
+					problems.append(viewTag + ': image ' + image + ' is no member of the archive')
+					viewIds[viewTag] = None
+					continue
+				if member not in svgIds:
+					with zipFile.open(member) as stream:
+						svgIds[member] = readSvgIds(stream, image, problems)
+				viewIds[viewTag] = svgIds[member]
+
+		connectorIds = set()
+		for connector in fzp['connectors']:
+			connId = connector['id']
+			if connId in connectorIds:
+				problems.append('duplicate connector id: ' + str(connId))
+			connectorIds.add(connId)
+			for viewTag, layers in connector['views'].items():
+				if viewTag not in viewIds:
+					problems.append('connector ' + str(connId) + ': unknown view ' + viewTag)
+					continue
+				ids = viewIds[viewTag]
+				if ids is None:
+					continue
+				for _, svgId, terminalId in layers:
+					for attr, value in [['svgId', svgId], ['terminalId', terminalId]]:
+						if value is not None and value not in ids:
+							problems.append('connector ' + str(connId) + ': ' + attr + ' ' + value + ' not found in ' + viewTag)
+
+		for busId, members in fzp['buses']:
+			for member in members:
+				if member not in connectorIds:
+					problems.append('bus ' + str(busId) + ': unknown connector ' + str(member))
+	except (BadZipFile, OSError) as exc:
+		problems.append('cannot read archive: ' + str(exc))
+	except Exception as exc:
+		problems.append(str(exc) or type(exc).__name__)
+		result['traceback'] = traceback.format_exc()
+
+	result.update({'ok': not problems, 'numProblems': len(problems), 'problems': problems[:maxProblems]})
+	result['seconds'] = round(time.perf_counter() - start, 4)
+	return result
+
+
+def validateLibrary(paths, numProcesses=None, reportFunc=None, maxProblems=50):
+	'''
+		Check all given fzpz files (or those in the given folders) on a process pool using
+		numProcesses processes (default: all cores). reportFunc(result) is called for each file.
+		Return the report: summary counts and the results in the order of the files
+	'''
+	start = time.perf_counter()
+	files = findFzpzFiles(paths)
+	results = []
+	with ProcessPoolExecutor(max_workers=numProcesses) as pool:
+		chunkSize = max(1, len(files) // (4 * (numProcesses or os.cpu_count() or 1)))		# a few tasks per process
+		for result in pool.map(validateFzpz, files, [maxProblems] * len(files), chunksize=chunkSize):
+			if reportFunc is not None:
+				reportFunc(result)
+			results.append(result)
+	failed = sum(1 for result in results if not result['ok'])
+	return {
+		'files': len(results),
+		'ok': len(results) - failed,
+		'failed': failed,
+		'seconds': round(time.perf_counter() - start, 3),
+		'results': results
+	}
@@ -0,0 +1,119 @@
+'''
+	Watch mode: monitors part definitions (spec files and driver scripts like CreateArduinoMicro.py)
+	and regenerates a part whenever its definition changes. The parts are built incrementally
+	(see FritzingPart.setIncrementalBuild()), so only the outputs whose inputs changed are written
+	again, e.g. a changed text on m_texts only rewrites Main.svg and the fzpz file, a changed
+	schematic position of a MicroPin only Schematic.svg, the fzp and the fzpz file.
+	Everything runs in this process, so no interpreter start is needed per change.
+'''
+
+
+import os
+import time
+import runpy
+import traceback
+from fritzing.FritzingParts import FritzingPart
+from fritzing.FritzingSpecs import PartSpec, findSpecFiles
+
+
+class PartWatcher:
+	'''
+		Polls the modification times of the watched files every interval seconds.
+		paths may be spec files, driver scripts (.py) or folders containing spec files
+	'''
+
+	def __init__(self, paths, outRoot, interval=0.2, reportFunc=None):
+		self.m_paths = paths
+		self.m_outRoot = outRoot
+		self.m_interval = interval
+		self.m_reportFunc = reportFunc
+		self.m_mtimes = dict()		# file => last seen modification time
+
+
+	def getWatchedFiles(self):
+		ret = []
+		for path in self.m_paths:
+			if path.endswith('.py'):
+				ret.append(path)
+			else:
+				ret.extend(findSpecFiles([path]))
+		return ret
+
+
+	def getChangedFiles(self):
+		'''
+			return the files that are new or modified since the last call
+		'''
+		ret = []
+		for path in self.getWatchedFiles():
+			try:
+				mtime = os.stat(path).st_mtime_ns
+			except OSError:
+				continue		# e.g. removed or just being saved
+			if self.m_mtimes.get(path) != mtime:
+				self.m_mtimes[path] = mtime
+				ret.append(path)
+		return ret
+
+
+	def rebuild(self, path):
+		'''
+			build the part(s) of one definition file, return a result dict with the
+			regenerated outputs per part
+		'''
+		start = time.perf_counter()
+		result = {'file': path, 'ok': False, 'outputs': dict(), 'error': None}
+		try:
+			if path.endswith('.py'):
+				scriptGlobals = self.runScript(path)
+				parts = [value for value in scriptGlobals.values() if isinstance(value, FritzingPart)]
+			else:
+				parts = [PartSpec.load(path).build(self.m_outRoot, incremental=True)]
+			for part in parts:
+				result['outputs'][part.m_filenameRoot] = part.m_writtenOutputs
+			result['ok'] = True
+		except Exception as exc:
+			result['error'] = str(exc) or type(exc).__name__
+			result['traceback'] = traceback.format_exc()
+		result['seconds'] = round(time.perf_counter() - start, 3)
+		return result
+
+
+	def runScript(self, path):
+		'''
+			run a driver script, its parts build incrementally. Return the globals of the script
+		'''
+		incremental = FritzingPart.s_incrementalByDefault
+		FritzingPart.s_incrementalByDefault = True
+		try:
+			return runpy.run_path(path, run_name='__main__')
+		except SystemExit as exc:
+			# sys.exit() of the script must not end the watch loop
+			raise Exception(path + ' called sys.exit(' + ('' if exc.code is None else repr(exc.code)) + ')')
+		finally:
+			FritzingPart.s_incrementalByDefault = incremental
+
+
+	def poll(self):
+		'''
+			rebuild all changed files once, return their results
+		'''
+		results = []
+		for path in self.getChangedFiles():
+			result = self.rebuild(path)
+			if self.m_reportFunc is not None:
+				self.m_reportFunc(result)
+			results.append(result)
+		return results
+
+
+	def run(self):
+		'''
+			build everything once and then rebuild on every change, until interrupted
+		'''
+		try:
+			while True:
+				self.poll()
+				time.sleep(self.m_interval)
+		except KeyboardInterrupt:
+			pass
@@ -0,0 +1,194 @@
+'''
+	A long running worker that keeps fritzing.FritzingParts loaded and builds parts on request,
+	so tools generating a part per edit do not pay the interpreter start for every build.
+
+	Protocol: one json object per line, one json answer per line (stdin/stdout or a unix socket).
+	Requests:
+		{"id": 1, "spec": {...}}				build an inline spec (see fritzing.FritzingSpecs)
+		{"id": 2, "specFile": "a.json"}		build a spec file
+		{"id": 3, "script": "CreateX.py"}		run a driver script like CreateArduinoMicro.py
+	optional keys of build requests:
+		"out": output folder (default: the folder of the worker)
+		"return": "paths" (default) or "bytes" (the fzpz file base64 encoded, nothing written to disk)
+		"incremental": true, "compression": "stored"|"fast"|"default"|"max", "reproducible": true
+	Commands:
+		{"command": "ping"}, {"command": "shutdown"}
+	Answers:
+		{"id": .., "ok": true, "parts": [..], "files": [..], "fzpz": "<base64>", "seconds": ..}
+		{"id": .., "ok": false, "error": ".."}
+'''
+
+
+import os
+import gc
+import sys
+import json
+import time
+import runpy
+import base64
+import socketserver
+import traceback
+from contextlib import redirect_stdout
+from fritzing.FritzingParts import FritzingPart, MemorySink
+from fritzing.FritzingSpecs import PartSpec
+
+
+class PartWorker:
+	'''
+		Handles the build requests. After each job the part trees are released,
+		after maxJobs jobs the worker stops (to be restarted by its client)
+	'''
+
+	def __init__(self, outRoot, maxJobs=None):
+		self.m_outRoot = outRoot
+		self.m_maxJobs = maxJobs
+		self.m_numJobs = 0
+		self.m_running = True
+		FritzingPart.getLibraryFingerprint()		# warm up
+
+
+	def handleLine(self, line):
+		'''
+			return the answer line for one request line
+		'''
+		try:
+			request = json.loads(line)
+		except ValueError as exc:
+			return json.dumps({'id': None, 'ok': False, 'error': 'invalid json: ' + str(exc)})
+		if not isinstance(request, dict):
+			return json.dumps({'id': None, 'ok': False, 'error': 'request must be a json object'})
+		return json.dumps(self.handleRequest(request))
+
+
+	def handleRequest(self, request):
+		'''
+			return the answer dict for one request dict
+		'''
+		answer = {'id': request.get('id'), 'ok': False}
+		command = request.get('command')
+		if command == 'ping':
+			answer['ok'] = True
+			return answer
+		if command == 'shutdown':
+			self.m_running = False
+			answer['ok'] = True
+			return answer
+		if command is not None:
+			answer['error'] = 'unknown command: ' + str(command)
+			return answer
+
+		start = time.perf_counter()
+		try:
+			if 'script' in request:
+				self.runScript(request, answer)
+			else:
+				self.buildSpec(request, answer)
+			answer['ok'] = True
+		except Exception as exc:
+			answer['error'] = str(exc) or type(exc).__name__
+			answer['traceback'] = traceback.format_exc()
+		finally:
+			# release the part trees of this job
+			gc.collect()
+		answer['seconds'] = round(time.perf_counter() - start, 3)
+		self.m_numJobs += 1
+		if self.m_maxJobs is not None and self.m_numJobs >= self.m_maxJobs:
+			self.m_running = False
+		return answer
+
+
+	def buildSpec(self, request, answer):
+		if 'spec' in request:
+			spec = PartSpec(request['spec'], '<request ' + str(request.get('id')) + '>')
+		elif 'specFile' in request:
+			spec = PartSpec.load(request['specFile'])
+		else:
+			raise Exception('request needs spec, specFile or script')
+
+		zipOptions = None
+		if 'compression' in request or 'reproducible' in request:
+			zipOptions = [request.get('compression', 'default'), request.get('reproducible', False)]
+		returnBytes = request.get('return', 'paths') == 'bytes'
+		outRoot = None if returnBytes else request.get('out', self.m_outRoot)
+		part = spec.build(outRoot, incremental=request.get('incremental', False) and not returnBytes, zipOptions=zipOptions)
+
+		answer['parts'] = [spec.getFileNameRoot()]
+		if returnBytes:
+			answer['fzpz'] = base64.b64encode(part.getOutputBytes('.fzpz')).decode('ascii')
+		else:
+			answer['files'] = self.getWrittenFiles(part)
+
+
+	def runScript(self, request, answer):
+		'''
+			run a driver script in this (warm) interpreter and report the parts it created
+		'''
+		with redirect_stdout(sys.stderr):		# keep stdout clean for the answers
+			try:
+				scriptGlobals = runpy.run_path(request['script'], run_name='__main__')
+			except SystemExit as exc:
+				# sys.exit() of the script must not end the worker
+				raise Exception(request['script'] + ' called sys.exit(' + ('' if exc.code is None else repr(exc.code)) + ')')
+		parts = [value for value in scriptGlobals.values() if isinstance(value, FritzingPart)]
+		answer['parts'] = [part.m_filenameRoot for part in parts]
+		answer['files'] = [name for part in parts for name in self.getWrittenFiles(part)]
+		scriptGlobals.clear()
+
+
+	def getWrittenFiles(self, part):
+		if isinstance(part.m_outputSink, MemorySink) or part.m_outFolder is None:
+			return []
+		ret = []
+		for postfix in ['Main.svg', 'Icon.svg', 'Schematic.svg', 'Pcb.svg', '.fzp', '.fzpz']:
+			fullName = part.getFullPathFor(postfix)
+			if os.path.exists(fullName):
+				ret.append(os.path.abspath(fullName))
+		return ret
+
+
+	def serveStream(self, inStream, outStream):
+		'''
+			answer the json lines of inStream on outStream until shutdown or end of input
+		'''
+		for line in inStream:
+			if not line.strip():
+				continue
+			outStream.write(self.handleLine(line) + '\n')
+			outStream.flush()
+			if not self.m_running:
+				break
+
+
+	def serveUnixSocket(self, path):
+		'''
+			answer the json lines of clients connecting to the unix socket path, one client at a time
+		'''
+		worker = self
+
+		class Handler(socketserver.StreamRequestHandler):
+			def handle(self):
+				for line in self.rfile:
+					if not line.strip():
+						continue
+					self.wfile.write((worker.handleLine(line.decode('utf-8')) + '\n').encode('utf-8'))
+					self.wfile.flush()
+					if not worker.m_running:
+						break
+
+		if os.path.exists(path):
+			os.remove(path)
+		with socketserver.UnixStreamServer(path, Handler) as server:
+			while self.m_running:
+				server.handle_request()
+		os.remove(path)
+
+
+def runWorker(outRoot, socketPath=None, maxJobs=None):
+	'''
+		serve requests on stdin/stdout or (if socketPath is given) on a unix socket
+	'''
+	worker = PartWorker(outRoot, maxJobs)
+	if socketPath:
+		worker.serveUnixSocket(socketPath)
+	else:
+		worker.serveStream(sys.stdin, sys.stdout)
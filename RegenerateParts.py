@@ -0,0 +1,38 @@
+'''
+	Imports existing fzpz files (see fritzing.FritzingImporter) and generates them again with the
+	current library, in parallel, one part per process of a process pool.
+
+	call: python RegenerateParts.py [-o outFolder] [-s specFolder] [-j numProcesses] fzpz-or-folder ...
+	e.g.: python RegenerateParts.py -s specs/legacy legacyParts
+
+	With -s the recovered spec of each part is written as json, to maintain the part as spec from now on.
+	Prints one line per part and ends with exit code 1 if any part failed.
+'''
+
+
+import os
+import sys
+import argparse
+from fritzing.FritzingImporter import regenerateParts
+
+
+def report(result):
+	if result['ok']:
+		print('ok     ' + str(result['part']) + ' (' + str(result['seconds']) + ' s)')
+	else:
+		print('FAILED ' + result['fzpz'] + ': ' + result['error'])
+
+
+if __name__ == '__main__':
+	ownFolder = os.path.dirname(os.path.abspath(__file__))
+	parser = argparse.ArgumentParser(description='generate existing fritzing parts again')
+	parser.add_argument('fzpz', nargs='+', help='fzpz files or folders containing fzpz files')
+	parser.add_argument('-o', '--out', default=ownFolder + '/generated', help='output folder (default: generated)')
+	parser.add_argument('-s', '--specs', default=None, help='folder for the recovered spec files')
+	parser.add_argument('-j', '--jobs', type=int, default=None, help='number of processes (default: all cores)')
+	args = parser.parse_args()
+
+	results = regenerateParts(args.fzpz, args.out, args.specs, args.jobs, report)
+	failed = [result for result in results if not result['ok']]
+	print(str(len(results) - len(failed)) + ' parts regenerated, ' + str(len(failed)) + ' failed')
+	sys.exit(1 if failed else 0)
@@ -0,0 +1,23 @@
+'''
+	Starts a long running worker that builds fritzing parts on request (see fritzing.FritzingWorker
+	for the json lines protocol). Without --socket it reads requests from stdin and answers on stdout.
+
+	call: python RunPartWorker.py [-o outFolder] [--socket path] [--max-jobs n]
+	e.g.: echo '{"id": 1, "specFile": "specs/ArduinoMicro_00.json"}' | python RunPartWorker.py
+'''
+
+
+import os
+import argparse
+from fritzing.FritzingWorker import runWorker
+
+
+if __name__ == '__main__':
+	ownFolder = os.path.dirname(os.path.abspath(__file__))
+	parser = argparse.ArgumentParser(description='worker building fritzing parts on request')
+	parser.add_argument('-o', '--out', default=ownFolder + '/generated', help='default output folder (default: generated)')
+	parser.add_argument('--socket', default=None, help='serve on this unix socket instead of stdin/stdout')
+	parser.add_argument('--max-jobs', type=int, default=None, help='stop after this number of jobs')
+	args = parser.parse_args()
+
+	runWorker(args.out, args.socket, args.max_jobs)
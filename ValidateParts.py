@@ -0,0 +1,43 @@
+'''
+	Checks fzpz files (e.g. a whole part library) in parallel, see fritzing.FritzingValidator.
+
+	call: python ValidateParts.py [-o report.json] [-j numProcesses] [-q] fzpz-or-folder ...
+	e.g.: python ValidateParts.py -o report.json generated
+
+	Prints the problems of each failed file (and the files without problems, unless -q) and a summary.
+	With -o the whole report is written as json (- for stdout). Ends with exit code 1 if any file failed.
+'''
+
+
+import sys
+import json
+import argparse
+from fritzing.FritzingValidator import validateLibrary
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(description='check fritzing fzpz files')
+	parser.add_argument('fzpz', nargs='+', help='fzpz files or folders containing fzpz files')
+	parser.add_argument('-o', '--out', default=None, help='json report file (- for stdout)')
+	parser.add_argument('-j', '--jobs', type=int, default=None, help='number of processes (default: all cores)')
+	parser.add_argument('-q', '--quiet', action='store_true', help='print only the failed files')
+	args = parser.parse_args()
+	log = sys.stderr if args.out == '-' else sys.stdout
+
+	def report(result):
+		if not result['ok']:
+			print('FAILED ' + result['fzpz'] + ' (' + str(result['numProblems']) + ' problems)', file=log)
+			for problem in result['problems']:
+				print('       ' + problem, file=log)
+		elif not args.quiet:
+			print('ok     ' + result['fzpz'], file=log)
+
+	summary = validateLibrary(args.fzpz, args.jobs, report)
+	print(str(summary['ok']) + ' files ok, ' + str(summary['failed']) + ' failed (' + str(summary['seconds']) + ' s)', file=log)
+	if args.out == '-':
+		json.dump(summary, sys.stdout, indent='\t')
+		print()
+	elif args.out:
+		with open(args.out, 'w', encoding='utf-8') as reportFile:
+			json.dump(summary, reportFile, indent='\t')
+	sys.exit(1 if summary['failed'] else 0)
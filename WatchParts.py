@@ -0,0 +1,33 @@
+'''
+	Watches part definitions and regenerates only the changed outputs of a part
+	whenever its definition is saved (see fritzing.FritzingWatcher).
+
+	call: python WatchParts.py [-o outFolder] [--interval seconds] spec-script-or-folder ...
+	e.g.: python WatchParts.py CreateArduinoMicro.py specs
+'''
+
+
+import os
+import argparse
+from fritzing.FritzingWatcher import PartWatcher
+
+
+def report(result):
+	if not result['ok']:
+		print('FAILED ' + result['file'] + ': ' + result['error'])
+		return
+	for part, outputs in result['outputs'].items():
+		written = ', '.join(outputs) if outputs else 'unchanged'
+		print(part + ': ' + written + ' (' + str(result['seconds']) + ' s)')
+
+
+if __name__ == '__main__':
+	ownFolder = os.path.dirname(os.path.abspath(__file__))
+	parser = argparse.ArgumentParser(description='regenerate fritzing parts when their definition changes')
+	parser.add_argument('paths', nargs='+', help='spec files, driver scripts or folders containing spec files')
+	parser.add_argument('-o', '--out', default=ownFolder + '/generated', help='output folder for spec files (default: generated)')
+	parser.add_argument('--interval', type=float, default=0.2, help='polling interval in seconds')
+	args = parser.parse_args()
+
+	print('watching ' + ', '.join(args.paths) + ' (stop with ctrl-c)')
+	PartWatcher(args.paths, args.out, args.interval, report).run()
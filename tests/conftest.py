@@ -0,0 +1,16 @@
+'''
+	The modules import each other as fritzing.X (the checkout is the package fritzing).
+	If the checkout is not importable under that name, register it as namespace package
+'''
+
+
+import os
+import sys
+import types
+
+try:
+	import fritzing.FritzingParts
+except ImportError:
+	package = types.ModuleType('fritzing')
+	package.__path__ = [os.path.dirname(os.path.dirname(os.path.abspath(__file__)))]
+	sys.modules['fritzing'] = package
@@ -0,0 +1,62 @@
+'''
+	Pin arrays and grids: the numpy and the plain python AffineTransform give the same coordinates,
+	and a row with a duplicate pin name changes nothing
+'''
+
+
+import pytest
+import fritzing.FritzingParts as parts
+from fritzing.FritzingParts import AffineTransform, FritzingMicroProcessor, MicroPin
+
+
+s_cases = [
+	# num, numColumns, pitchX, pitchY, angle, x, y
+	[40, 40, 2.54, 0, 0, 5.08, 3.0],
+	[40, 40, 2.54, 0, 90, 5.08, 3.0],
+	[40, 40, 2.54, 0, 180, 50.8, 3.0],
+	[40, 40, 2.54, 0, 270, 5.08, 60.0],
+	[80, 2, 0.1, 0.1, 0, 0.3, 0.2],
+	[80, 2, 0.1, 0.1, -90, 0.3, 8.2],
+	[100, 10, 1.27, 1.27, 45, 20.0, 20.0],
+	[64, 8, 0.8, 0.65, 30, 3.3, 7.1],
+]
+
+
+def getPoints(numpyModule, monkeypatch, case):
+	num, numColumns, pitchX, pitchY, angle, x, y = case
+	monkeypatch.setattr(parts, 'numpy', numpyModule)
+	xs, ys = AffineTransform.getGridPoints(num, numColumns, pitchX, pitchY)
+	return AffineTransform.rotation(angle, x, y).apply(xs, ys)
+
+
+@pytest.mark.parametrize('case', s_cases)
+def test_numpyAndPlainPython(case, monkeypatch):
+	numpyModule = pytest.importorskip('numpy')
+	plain = getPoints(None, monkeypatch, case)
+	vectorized = getPoints(numpyModule, monkeypatch, case)
+	assert vectorized == plain
+	assert all(type(value) is float for value in plain[0] + vectorized[0])
+
+
+def test_rightAnglesAreExact(monkeypatch):
+	xs, ys = getPoints(None, monkeypatch, [4, 4, 2.54, 0, 90, 1.0, 2.0])
+	assert xs == [1.0] * 4
+	assert ys == [2.0, 4.54, 7.08, 9.62]
+
+
+def test_duplicateNameChangesNothing():
+	miPro = FritzingMicroProcessor('mm', None, 'Test', 20, 10, 2.54)
+	miPro.addPinGrid('header', 2.54, 2.54, 2, 2.54, 2.54, [MicroPin('A', 't1'), MicroPin('B', 't2')])
+	before = dict(miPro.m_pinsByName), list(miPro.m_pinRows['header'])
+	for addRow in [lambda pins: miPro.addPinGrid('header', 0, 0, 2, 2.54, 2.54, pins),
+			lambda pins: miPro.addPinRow('header', 0, 0, 2.54, 0, pins)]:
+		with pytest.raises(Exception, match='duplicate name: C'):
+			addRow([MicroPin('C', 't1'), MicroPin('D', 't2'), MicroPin('C', 't3')])
+		assert (dict(miPro.m_pinsByName), list(miPro.m_pinRows['header'])) == before
+		with pytest.raises(Exception, match='duplicate name: A'):
+			miPro.addPinRow('other', 0, 5, 2.54, 0, [MicroPin('E', 't4'), MicroPin('A', 't5')])
+		assert 'other' not in miPro.m_pinRows and 'E' not in miPro.m_pinsByName
+
+	# replacing a row may reuse its own names
+	miPro.addPinRow('header', 0, 0, 2.54, 0, [MicroPin('B', 't1'), MicroPin('A', 't2')])
+	assert [pin.m_x for pin in miPro.m_pinRows['header']] == [0, 2.54]
@@ -0,0 +1,48 @@
+'''
+	Stress test of the per part UnitContext: mm and in parts built at the same time by many
+	threads of one process must give exactly the files of sequential builds
+'''
+
+
+import os
+import copy
+from concurrent.futures import ThreadPoolExecutor
+from fritzing.FritzingSpecs import PartSpec
+
+
+s_specFolder = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'specs')
+
+
+def loadSpecs():
+	'''
+		both spec files in mm and in
+	'''
+	ret = []
+	for name in ['BroadBreadBoard.json', 'ArduinoMicro_00.json']:
+		data = PartSpec.load(os.path.join(s_specFolder, name)).m_data
+		for unit in ['mm', 'in']:
+			variant = copy.deepcopy(data)
+			variant['unit'] = unit
+			variant['fileNameRoot'] = data['fileNameRoot'] + '_' + unit
+			ret.append(variant)
+	return ret
+
+
+def buildFiles(data):
+	'''
+		build the part in memory, return file name => bytes
+	'''
+	part = PartSpec(data).build(None, zipOptions=['default', True])
+	return dict(part.m_outputSink.m_files)
+
+
+def test_mixedUnitsInThreads():
+	specs = loadSpecs()
+	expected = [buildFiles(data) for data in specs]
+	assert expected[0] != expected[1]		# the unit really changes the files
+
+	jobs = specs * 8
+	with ThreadPoolExecutor(max_workers=16) as pool:
+		results = list(pool.map(buildFiles, jobs))
+	for index, files in enumerate(results):
+		assert files == expected[index % len(specs)], jobs[index]['fileNameRoot']
@@ -0,0 +1,53 @@
+'''
+	WriteBehindSink: several threads writing into one sink (like buildAll(pool='thread')) start
+	one writer thread only, close() returns and all files are complete
+'''
+
+
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fritzing.FritzingParts import WriteBehindSink
+
+
+def getWriterThreads():
+	return [thread for thread in threading.enumerate() if thread.name == 'WriteBehindSink']
+
+
+def writeFiles(sink, prefix, count, barrier):
+	barrier.wait()				# all threads start with their first file at once
+	for index in range(count):
+		sink.enqueue(prefix + str(index) + '.svg', (prefix * (index + 1) * 100).encode('utf-8'))
+
+
+def test_closeAfterConcurrentWrites(tmp_path):
+	switchInterval = sys.getswitchinterval()
+	sys.setswitchinterval(1e-6)		# switch threads often, to hit the start of the writer thread
+	try:
+		runTrials(tmp_path)
+	finally:
+		sys.setswitchinterval(switchInterval)
+
+
+def runTrials(tmp_path):
+	for trial in range(200):
+		folder = str(tmp_path / str(trial))
+		sink = WriteBehindSink(folder, maxPending=2)
+		prefixes = ['a', 'b', 'c', 'd', 'e', 'f']
+		barrier = threading.Barrier(len(prefixes))
+		with ThreadPoolExecutor(max_workers=len(prefixes)) as pool:
+			for future in [pool.submit(writeFiles, sink, prefix, 5, barrier) for prefix in prefixes]:
+				future.result()
+
+		closer = threading.Thread(target=sink.close, daemon=True)
+		closer.start()
+		closer.join(10)
+		assert not closer.is_alive(), 'close() hangs in trial ' + str(trial)
+		assert getWriterThreads() == []
+
+		for prefix in prefixes:
+			for index in range(5):
+				with open(os.path.join(folder, prefix + str(index) + '.svg'), 'rb') as stream:
+					assert stream.read() == (prefix * (index + 1) * 100).encode('utf-8')
+		assert sorted(os.listdir(folder)) == sorted(prefix + str(index) + '.svg' for prefix in prefixes for index in range(5))
@@ -0,0 +1,44 @@
+'''
+	Reproducible fzpz files: the same bytes for every sink and for the views rendered at the same time
+'''
+
+
+import io
+import os
+import pytest
+from fritzing.FritzingParts import ZipSink
+from fritzing.FritzingSpecs import PartSpec
+
+
+s_specFile = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'specs', 'ArduinoMicro_00.json')
+
+
+def buildAllIntoZip(spec):
+	'''
+		render the views of the spec at the same time into a reproducible ZipSink, return the fzpz bytes
+	'''
+	miPro = spec.createMicroProcessor(None)
+	stream = io.BytesIO()
+	miPro.setOutputSink(ZipSink(stream, 'default', True))
+	spec.fillMicroProcessor(miPro)
+	fzp, schematic = spec.need('fzp'), spec.need('schematic')
+	miPro.buildAll([schematic['width'], schematic['height'], schematic['outer']],
+		[fzp.get('moduleId', spec.getFileNameRoot() + 'ModuleID'), fzp['fritzingVersion'], fzp['meta'], fzp.get('tags', []), fzp.get('properties', [])])
+	return stream.getvalue()
+
+
+def test_zipSinkInThreads():
+	spec = PartSpec.load(s_specFile)
+	expected = spec.build(None, zipOptions=['default', True]).getOutputBytes('.fzpz')
+	for trial in range(20):
+		assert buildAllIntoZip(spec) == expected, 'trial ' + str(trial)
+
+
+@pytest.mark.parametrize('compression', ['stored', 'fast', 'default', 'max'])
+def test_fileSinkLikeMemorySink(tmp_path, compression):
+	spec = PartSpec.load(s_specFile)
+	part = spec.build(str(tmp_path), zipOptions=[compression, True])
+	with open(os.path.join(spec.getOutFolder(str(tmp_path)), spec.getFileNameRoot() + '.fzpz'), 'rb') as stream:
+		written = stream.read()
+	assert written == spec.build(None, zipOptions=[compression, True]).getOutputBytes('.fzpz')
+	assert part.m_outputsChanged